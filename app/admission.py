@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.database import pool_checkout_wait
+from app.metrics import REQUESTS_SHED, UNMATCHED_ROUTE, route_template
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+ROUTE_PRIORITIES = {
+    "POST /auth/refresh": HIGH,
+    "GET /devices/": LOW,
+    "GET /devices/terminals": LOW,
+    "GET /devices/{device_id}/terminals": LOW,
+    "GET /auth/users": LOW,
+    "POST /devices/batch": LOW,
+    "POST /devices/terminals/import": LOW,
+}
+# Never check out a database connection. Anything behind get_current_user can, on a user-cache miss.
+EXEMPT_ROUTES = {"/metrics", UNMATCHED_ROUTE}
+
+OVERLOADED_DETAIL = "Service is overloaded, retry later"
+
+
+class AdmissionGate:
+    """At most ``limit`` holders at a time; up to ``queue_size`` callers wait, by priority and then in arrival order.
+
+    A full queue turns away a newcomer unless it outranks the last waiter, which is then turned away instead.
+    Waiting longer than ``timeout`` also fails, so the queue never holds a request its client has given up on.
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    async def acquire(self, priority: int = NORMAL) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            last = max(self._waiters, default=None)
+            if last is None or last[0] <= priority:
+                return False
+            self._remove(last)
+            last[2].set_result(False)
+        waiter = (priority, next(self._arrivals), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await asyncio.wait([waiter[2]], timeout=self.timeout)
+        except asyncio.CancelledError:
+            if not waiter[2].done():
+                self._remove(waiter)
+            elif waiter[2].result():
+                self.release()
+            raise
+        if waiter[2].done():
+            return waiter[2].result()
+        self._remove(waiter)
+        return False
+
+    def release(self) -> None:
+        """Hand the slot to the first waiter, or free it."""
+        if self._waiters:
+            heapq.heappop(self._waiters)[2].set_result(True)
+        else:
+            self.active -= 1
+
+    def stats(self) -> dict:
+        return {"active": self.active, "waiting": len(self._waiters)}
+
+    def _remove(self, waiter: tuple) -> None:
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+
+
+global_gate = AdmissionGate(
+    settings.ADMISSION_MAX_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT
+)
+route_gates = {
+    route: AdmissionGate(limit, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT)
+    for route, limit in settings.ADMISSION_ROUTE_LIMITS.items()
+}
+
+
+def shed(request: Request, route: str, reason: str) -> JSONResponse:
+    REQUESTS_SHED.labels(request.method, route, reason).inc()
+    return JSONResponse(
+        {"detail": OVERLOADED_DETAIL},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+
+async def admission_middleware(request: Request, call_next):
+    """Bounds concurrent requests per route and overall, and fails fast once the database pool backs up.
+
+    While pool checkouts wait longer than ADMISSION_POOL_WAIT_THRESHOLD, every route except the
+    high-priority ones gets an immediate 503 instead of joining the pool queue. In the overall queue
+    high-priority requests (token refresh) go first and bulk listings and imports last.
+    """
+    route = route_template(request)
+    if route in EXEMPT_ROUTES:
+        return await call_next(request)
+    key = f"{request.method} {route}"
+    priority = ROUTE_PRIORITIES.get(key, NORMAL)
+    if priority != HIGH:
+        wait = pool_checkout_wait()
+        if wait > settings.ADMISSION_POOL_WAIT_THRESHOLD:
+            logger.debug("Shedding %s, database pool checkout waits %.2fs", key, wait)
+            return shed(request, route, "pool_wait")
+    route_gate = route_gates.get(key)
+    if route_gate is not None and not await route_gate.acquire(priority):
+        return shed(request, route, "route_limit")
+    try:
+        if not await global_gate.acquire(priority):
+            return shed(request, route, "queue")
+        try:
+            return await call_next(request)
+        finally:
+            global_gate.release()
+    finally:
+        if route_gate is not None:
+            route_gate.release()
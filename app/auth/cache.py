@@ -0,0 +1,33 @@
+from uuid import UUID
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.auth.models import User
+from app.cache import TwoTierCache
+from app.config import settings
+
+user_cache = TwoTierCache(
+    "auth_user",
+    ttl=settings.USER_CACHE_TTL,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL,
+    local_maxsize=settings.USER_CACHE_LOCAL_SIZE,
+)
+
+
+def dump_user(user: User) -> dict:
+    return {
+        "id": str(user.id),
+        "first_name": user.first_name,
+        "middle_name": user.middle_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+    }
+
+
+def load_user(user_data: dict) -> User:
+    """Rebuild a detached User so it can still be added to a session and updated or deleted."""
+    user = User(**{**user_data, "id": UUID(user_data["id"])})
+    make_transient_to_detached(user)
+    return user
@@ -3,7 +3,7 @@ import enum
 import uuid
 from typing import Annotated
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -18,18 +18,31 @@ class User(Base):
     first_name: Mapped[str]
     middle_name: Mapped[str]
     last_name: Mapped[str]
-    email: Mapped[str] = mapped_column(unique=True, index=True)
+    email: Mapped[str]
     is_active: Mapped[bool] = mapped_column(default=False)
     is_superuser: Mapped[bool] = mapped_column(default=False)
 
+    __table_args__ = (
+        Index("ix_auth_user_is_active_id", "is_active", "id"),
+        Index("ix_auth_user_is_superuser_id", "is_superuser", "id"),
+    )
+
+
+Index(
+    "ix_auth_user_email_lower",
+    func.lower(User.email).label("email_lower"),
+    unique=True,
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
+
 
 class RefreshToken(Base):
     __tablename__ = "refresh_token"
 
     id: Mapped[uuid_pk]
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("auth_user.id", ondelete="cascade"))
-    token: Mapped[str]
-    expires_at: Mapped[datetime.datetime]
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("auth_user.id", ondelete="cascade"), index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    expires_at: Mapped[datetime.datetime] = mapped_column(index=True)
 
 
 class Action(enum.Enum):
@@ -41,7 +54,17 @@ class VerifyCode(Base):
     __tablename__ = "verify_code"
 
     id: Mapped[uuid_pk]
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("auth_user.id", ondelete="cascade"))
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("auth_user.id", ondelete="cascade"), index=True)
     action: Mapped[Action]
     code: Mapped[str]
-    expires_at: Mapped[datetime.datetime]
+    expires_at: Mapped[datetime.datetime] = mapped_column(index=True)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id: Mapped[uuid_pk]
+    email_to: Mapped[str]
+    code: Mapped[str]
+    action: Mapped[Action]
+    created_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.now, index=True)
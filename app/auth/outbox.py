@@ -0,0 +1,54 @@
+import asyncio
+import datetime
+import logging
+import time
+
+from app.auth.repositories import AuthRepository
+from app.config import settings
+from app.database import async_session_maker
+from app.metrics import EMAIL_OUTBOX_DELAY, TASK_ENQUEUE_LATENCY
+from app.tasks.tasks import sent_verification_emails
+
+logger = logging.getLogger(__name__)
+
+_pending = asyncio.Event()
+
+
+async def wake_email_outbox_relay() -> None:
+    """Commit hook: relay a new message right away instead of at the next polling interval."""
+    _pending.set()
+
+
+async def relay_email_outbox() -> int:
+    """Move one batch of outbox messages to Celery; the rows are deleted only if publishing succeeds."""
+    async with async_session_maker() as session:
+        messages = await AuthRepository(session).pop_email_outbox_messages(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        if not messages:
+            return 0
+        emails = [
+            {"email_to": message.email_to, "code": message.code, "action": message.action.value}
+            for message in messages
+        ]
+        # The broker publish is blocking, keep it off the event loop.
+        started = time.perf_counter()
+        await asyncio.to_thread(sent_verification_emails.delay, emails)
+        TASK_ENQUEUE_LATENCY.labels(sent_verification_emails.name).observe(time.perf_counter() - started)
+        await session.commit()
+    now = datetime.datetime.now()
+    for message in messages:
+        EMAIL_OUTBOX_DELAY.observe((now - message.created_at).total_seconds())
+    return len(messages)
+
+
+async def run_email_outbox_relay() -> None:
+    while True:
+        _pending.clear()
+        try:
+            while await relay_email_outbox() == settings.EMAIL_OUTBOX_BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("Email outbox relay failed, retrying next interval")
+        try:
+            await asyncio.wait_for(_pending.wait(), settings.EMAIL_OUTBOX_RELAY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
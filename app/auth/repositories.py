@@ -1,100 +1,272 @@
+import datetime
+from functools import partial
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import Select, delete, func, select, update
+from redis import asyncio as aioredis
+from sqlalchemy import Row, Select, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.models import RefreshToken, User, VerifyCode
-from app.database import get_async_session
+from app.auth.cache import dump_user, load_user, user_cache
+from app.auth.models import Action, EmailOutbox, RefreshToken, User, VerifyCode
+from app.cache import redis_client
+from app.config import settings
+from app.database import after_commit, get_async_session, on_primary, save
 
 
 class AuthRepository:
     user_table = User
     refresh_token_table = RefreshToken
     verify_code_table = VerifyCode
+    email_outbox_table = EmailOutbox
+    # Columns of UserInfoSchema, in field order, for the listing that skips the ORM.
+    user_list_columns = (
+        User.first_name, User.last_name, User.middle_name, User.email, User.id, User.is_active, User.is_superuser,
+    )
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_users(self) -> list[User] | None:
-        statement = select(self.user_table).where(self.user_table.is_active)
+    async def get_users(
+            self,
+            limit: int,
+            after: UUID | None = None,
+            is_active: bool | None = None,
+            is_superuser: bool | None = None,
+            email_prefix: str | None = None,
+    ) -> list[Row]:
+        statement = select(*self.user_list_columns).order_by(self.user_table.id).limit(limit)
+        if after:
+            statement = statement.where(self.user_table.id > after)
+        if is_active is not None:
+            statement = statement.where(self.user_table.is_active == is_active)
+        if is_superuser is not None:
+            statement = statement.where(self.user_table.is_superuser == is_superuser)
+        if email_prefix:
+            statement = statement.where(
+                func.lower(self.user_table.email).startswith(email_prefix.lower(), autoescape=True)
+            )
         result = await self.session.execute(statement)
-        return result.scalars()
+        return list(result)
 
     async def get_user_by_id(self, id: UUID) -> User | None:
-        statement = select(self.user_table).where(self.user_table.id == id)
-        return await self._get_user(statement)
+        cached_user = await user_cache.get(str(id))
+        if cached_user:
+            return load_user(cached_user)
+        # The row goes into the shared cache, so a lagging replica must not put back a user just updated or deleted.
+        statement = on_primary(select(self.user_table).where(self.user_table.id == id))
+        user = await self._get_user(statement)
+        if user:
+            await user_cache.set(str(id), dump_user(user))
+        return user
 
     async def get_user_by_email(self, email: str) -> User | None:
         statement = select(self.user_table).where(
-            func.lower(self.user_table.email) == func.lower(email)
+            func.lower(self.user_table.email) == email.lower()
         )
         return await self._get_user(statement)
 
     async def create_user(self, user_data: dict) -> User:
         user = self.user_table(**user_data)
         self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        await save(self.session)
         return user
 
     async def verify_user(self, user: User) -> None:
         user.is_active = True
-        await self.session.commit()
+        self._invalidate_cached_user(user)
+        await save(self.session)
 
     async def update_user(self, user: User, user_data: dict) -> User:
         for key, value in user_data.items():
             if value:
                 setattr(user, key, value)
         self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        self._invalidate_cached_user(user)
+        await save(self.session)
         return user
 
     async def delete_user(self, user: User) -> None:
         await self.session.delete(user)
-        await self.session.commit()
+        self._invalidate_cached_user(user)
+        await save(self.session)
 
     async def create_verify_code(self, verify_code_data: dict) -> str:
         verify_code = self.verify_code_table(**verify_code_data)
         self.session.add(verify_code)
-        await self.session.commit()
+        await save(self.session)
         return verify_code.code
 
-    async def get_verify_code(self, verify_code_data: dict) -> VerifyCode:
-        statement = select(self.verify_code_table).filter_by(**verify_code_data)
+    async def pop_verify_code(self, user_id: UUID, code: str, action: Action) -> VerifyCode | None:
+        statement = (
+            delete(self.verify_code_table)
+            .where(
+                self.verify_code_table.user_id == user_id,
+                self.verify_code_table.code == code,
+                self.verify_code_table.action == action,
+            )
+            .returning(self.verify_code_table)
+        )
         results = await self.session.execute(statement)
-        return results.unique().scalar_one_or_none()
+        verify_code = results.scalars().first()
+        if verify_code:
+            await self.session.execute(
+                delete(self.verify_code_table).where(self.verify_code_table.user_id == user_id)
+            )
+            await save(self.session)
+        return verify_code
 
     async def delete_users_verify_codes(self, user: User) -> None:
         statement = delete(self.verify_code_table).where(
             self.verify_code_table.user_id == user.id
         )
         await self.session.execute(statement)
-        await self.session.commit()
+        await save(self.session)
 
     async def create_refresh_token(self, refresh_token_data: dict) -> RefreshToken:
         refresh_token = self.refresh_token_table(**refresh_token_data)
         self.session.add(refresh_token)
-        await self.session.commit()
-        await self.session.refresh(refresh_token)
+        await save(self.session)
         return refresh_token
 
-    async def get_refresh_token(self, token: str) -> RefreshToken | None:
-        statement = select(self.refresh_token_table).where(
-            self.refresh_token_table.token == token
+    async def pop_refresh_token(self, token_hash: str) -> RefreshToken | None:
+        """Delete the token and return it, uncommitted, so rotation commits together with the new token."""
+        statement = (
+            delete(self.refresh_token_table)
+            .where(self.refresh_token_table.token_hash == token_hash)
+            .returning(self.refresh_token_table)
         )
         results = await self.session.execute(statement)
-        return results.unique().scalar_one_or_none()
+        return results.scalar_one_or_none()
 
-    async def delete_refresh_token(self, token: RefreshToken) -> None:
-        await self.session.delete(token)
-        await self.session.commit()
+    async def create_email_outbox_message(self, message_data: dict) -> EmailOutbox:
+        message = self.email_outbox_table(**message_data)
+        self.session.add(message)
+        await save(self.session)
+        return message
+
+    async def pop_email_outbox_messages(self, limit: int) -> list[EmailOutbox]:
+        """Delete and return the oldest messages, uncommitted, skipping rows another relay has locked."""
+        pending = (
+            select(self.email_outbox_table.id)
+            .order_by(self.email_outbox_table.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            delete(self.email_outbox_table)
+            .where(self.email_outbox_table.id.in_(pending.scalar_subquery()))
+            .returning(self.email_outbox_table)
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        return list(results.scalars())
+
+    async def delete_expired_refresh_tokens(self, expired_before: datetime.datetime, limit: int) -> int:
+        return await self._delete_expired(self.refresh_token_table, expired_before, limit)
+
+    async def delete_expired_verify_codes(self, expired_before: datetime.datetime, limit: int) -> int:
+        return await self._delete_expired(self.verify_code_table, expired_before, limit)
+
+    async def _delete_expired(
+            self,
+            table: type[RefreshToken] | type[VerifyCode],
+            expired_before: datetime.datetime,
+            limit: int,
+    ) -> int:
+        """Delete at most ``limit`` expired rows, oldest first along the expires_at index, skipping locked rows."""
+        expired = (
+            select(table.id)
+            .where(table.expires_at < expired_before)
+            .order_by(table.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            delete(table)
+            .where(table.id.in_(expired.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(statement)
+        return result.rowcount
 
     async def _get_user(self, statement: Select) -> User | None:
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
 
+    def _invalidate_cached_user(self, user: User) -> None:
+        after_commit(self.session, partial(user_cache.delete, str(user.id)))
+
 
 async def get_auth_repository(session: AsyncSession = Depends(get_async_session)):
     yield AuthRepository(session)
+
+
+class RedisVerifyCodeRepository:
+    """Verify codes kept in Redis, one key per user, expired by Redis itself.
+
+    Writes wait for the request's session to commit, like the email_outbox row that carries the code, so a
+    rolled back request neither leaves a code without its e-mail nor wipes the code the user already has.
+    """
+
+    key_prefix = "verify_code"
+
+    # Deletes the key only when both code and action match, so a wrong guess keeps the code usable.
+    pop_script = """
+    local stored = redis.call('HMGET', KEYS[1], 'code', 'action', 'expires_at')
+    if stored[1] == ARGV[1] and stored[2] == ARGV[2] then
+        redis.call('DEL', KEYS[1])
+        return stored
+    end
+    return nil
+    """
+
+    def __init__(self, client: aioredis.Redis, session: AsyncSession):
+        self.client = client
+        self.session = session
+        self._pop = client.register_script(self.pop_script)
+
+    async def create_verify_code(self, verify_code_data: dict) -> str:
+        after_commit(self.session, partial(self._store_verify_code, verify_code_data))
+        return verify_code_data["code"]
+
+    async def _store_verify_code(self, verify_code_data: dict) -> None:
+        expires_at: datetime.datetime = verify_code_data["expires_at"]
+        ttl = max(int((expires_at - datetime.datetime.now()).total_seconds()), 1)
+        key = self._key(verify_code_data["user_id"])
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "code": verify_code_data["code"],
+                    "action": verify_code_data["action"].value,
+                    "expires_at": expires_at.isoformat(),
+                },
+            )
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def pop_verify_code(self, user_id: UUID, code: str, action: Action) -> VerifyCode | None:
+        stored = await self._pop(keys=[self._key(user_id)], args=[code, action.value])
+        if not stored:
+            return None
+        stored_code, stored_action, expires_at = (value.decode() for value in stored)
+        return VerifyCode(
+            user_id=user_id,
+            code=stored_code,
+            action=Action(stored_action),
+            expires_at=datetime.datetime.fromisoformat(expires_at),
+        )
+
+    async def delete_users_verify_codes(self, user: User) -> None:
+        after_commit(self.session, partial(self.client.delete, self._key(user.id)))
+
+    def _key(self, user_id: UUID) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+
+async def get_verify_code_repository(session: AsyncSession = Depends(get_async_session)):
+    if settings.VERIFY_CODE_BACKEND == "redis":
+        yield RedisVerifyCodeRepository(redis_client, session)
+    else:
+        yield AuthRepository(session)
@@ -1,7 +1,7 @@
 import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from app.auth.exceptions import (
     AuthenticationRequiredException,
@@ -18,13 +18,16 @@ from app.auth.schemas import EmailSchema, TokenSchema, UserCreateSchema, UserInf
     UserUpdateSchema
 from app.auth.services import AuthService, get_auth_service
 from app.auth.utils import get_current_superuser, get_current_user
+from app.database import read_your_writes
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageResponse, PageSchema, decode_cursor
+from app.query_stats import query_budget
 
 router = APIRouter(
     prefix="/auth"
 )
 
 
-@router.post("/register")
+@router.post("/register", dependencies=[Depends(query_budget(5)), Depends(read_your_writes)])
 async def register(
         user_data: UserCreateSchema,
         auth_service: AuthService = Depends(get_auth_service)
@@ -40,29 +43,24 @@ async def register(
     return {"status": "verify code sent on email"}
 
 
-@router.post("/verify_register")
+@router.post("/verify_register", dependencies=[Depends(query_budget(4)), Depends(read_your_writes)])
 async def verify_register(
         code_data: VerifyCodeSchema,
         auth_service: AuthService = Depends(get_auth_service)
 ) -> dict:
-    code_data = code_data.model_dump()
-    email = code_data.pop("email")
-    user = await auth_service.get_user_by_email(email)
+    user = await auth_service.get_user_by_email(code_data.email)
     if not user:
         raise NoSuchUserException
-    code_data["user_id"] = user.id
-    verify_code = await auth_service.get_verify_code(code_data)
-    if not verify_code or verify_code.action != Action.register:
+    verify_code = await auth_service.pop_verify_code(user, code_data.code, Action.register)
+    if not verify_code:
         raise NoSuchCodeException
     if verify_code.expires_at < datetime.datetime.now():
-        await auth_service.delete_users_verify_codes(user)
         raise CodeExpiredException
     await auth_service.verify_user(user)
-    await auth_service.delete_users_verify_codes(user)
     return {"status": "Registration success"}
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(query_budget(4)), Depends(read_your_writes)])
 async def login(
         email_data: EmailSchema,
         auth_service: AuthService = Depends(get_auth_service),
@@ -75,34 +73,29 @@ async def login(
     return {"status": "verify code sent on email"}
 
 
-@router.post("/verify_login")
+@router.post("/verify_login", dependencies=[Depends(query_budget(4)), Depends(read_your_writes)])
 async def verify_login(
         code_data: VerifyCodeSchema,
         auth_service: AuthService = Depends(get_auth_service),
 ):
-    code_data = code_data.model_dump()
-    email = code_data.pop("email")
-    user = await auth_service.get_user_by_email(email)
+    user = await auth_service.get_user_by_email(code_data.email)
     if not user or not user.is_active:
         raise NoSuchUserException
-    code_data["user_id"] = user.id
-    verify_code = await auth_service.get_verify_code(code_data)
-    if not verify_code or verify_code.action != Action.login:
+    verify_code = await auth_service.pop_verify_code(user, code_data.code, Action.login)
+    if not verify_code:
         raise NoSuchCodeException
     if verify_code.expires_at < datetime.datetime.now():
-        await auth_service.delete_users_verify_codes(user)
         raise CodeExpiredException
-    await auth_service.delete_users_verify_codes(user)
     tokens = await auth_service.generate_tokens(user)
     return tokens
 
 
-@router.post("/refresh")
+@router.post("/refresh", dependencies=[Depends(query_budget(3))])
 async def refresh_tokens(
         token: TokenSchema,
         auth_service: AuthService = Depends(get_auth_service),
 ):
-    token = await auth_service.get_refresh_token(token.token)
+    token = await auth_service.pop_refresh_token(token.token)
     if not token:
         raise NoTokenException
     if token.expires_at < datetime.datetime.now():
@@ -110,12 +103,11 @@ async def refresh_tokens(
     user = await auth_service.get_user_by_id(token.user_id)
     if not user or not user.is_active:
         raise NoSuchUserException
-    await auth_service.delete_refresh_token(token)
     tokens = await auth_service.generate_tokens(user)
     return tokens
 
 
-@router.get("/me")
+@router.get("/me", dependencies=[Depends(query_budget(1))])
 async def me(
         user: User | None = Depends(get_current_user)
 ) -> UserInfoSchema:
@@ -124,7 +116,7 @@ async def me(
     return user
 
 
-@router.patch("/me")
+@router.patch("/me", dependencies=[Depends(query_budget(2))])
 async def update_info(
         user_data: UserUpdateSchema,
         user: User | None = Depends(get_current_user),
@@ -137,14 +129,25 @@ async def update_info(
     return user
 
 
-@router.get("/users")
+@router.get("/users", response_model=PageSchema[UserInfoSchema])
 async def get_users(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: str | None = None,
+        is_active: bool | None = True,
+        is_superuser: bool | None = None,
+        email: str | None = Query(None, description="Case-insensitive email prefix"),
         user: User | None = Depends(get_current_superuser),
         auth_service: AuthService = Depends(get_auth_service)
-) -> list[UserInfoSchema]:
+) -> PageResponse:
     if not user:
         raise PermissionDeniedException
-    return await auth_service.get_users()
+    return PageResponse(await auth_service.get_users(
+        limit,
+        decode_cursor(after),
+        is_active=is_active,
+        is_superuser=is_superuser,
+        email_prefix=email,
+    ))
 
 
 @router.delete("/users/{user_id}")
@@ -1,8 +1,11 @@
+import re
 from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, field_validator
 
+CODE_PATTERN = re.compile(r"[A-Z]{6}")
+
 
 class UserUpdateSchema(BaseModel):
 
@@ -43,7 +46,7 @@ class VerifyCodeSchema(EmailSchema):
 
     @field_validator("code")
     def check_code(cls, v):
-        if len(v) != 6 or not all(c.isupper() and c.isalpha() for c in v):
+        if not CODE_PATTERN.fullmatch(v):
             raise ValueError("Code must be 6 uppercase letters")
         return v
 
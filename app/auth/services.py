@@ -1,4 +1,5 @@
 import datetime
+import hashlib
 import random
 import secrets
 import string
@@ -8,18 +9,27 @@ from fastapi import Depends
 from jose import jwt
 
 from app.auth.models import Action, RefreshToken, User, VerifyCode
-from app.auth.repositories import AuthRepository, get_auth_repository
+from app.auth.outbox import wake_email_outbox_relay
+from app.auth.repositories import (
+    AuthRepository,
+    RedisVerifyCodeRepository,
+    get_auth_repository,
+    get_verify_code_repository,
+)
 from app.config import settings
-from app.tasks.tasks import sent_verification_email
+from app.database import after_commit
+from app.pagination import paginate
 
 
 class AuthService:
 
-    def __init__(self, auth_db: AuthRepository):
+    def __init__(self, auth_db: AuthRepository, verify_code_db: AuthRepository | RedisVerifyCodeRepository):
         self.auth_db = auth_db
+        self.verify_code_db = verify_code_db
 
-    async def get_users(self) -> list[User] | None:
-        return await self.auth_db.get_users()
+    async def get_users(self, limit: int, after: UUID | None = None, **filters) -> dict:
+        users = await self.auth_db.get_users(limit + 1, after, **filters)
+        return paginate(users, limit)
 
     async def get_user_by_id(self, user_id: UUID) -> User | None:
         return await self.auth_db.get_user_by_id(user_id)
@@ -49,21 +59,22 @@ class AuthService:
             "action": action,
             "expires_at": datetime.datetime.now() + datetime.timedelta(minutes=5)
         }
-        await self.auth_db.create_verify_code(code_data)
-        sent_verification_email.delay(user.email, code, action.value)
+        await self.verify_code_db.create_verify_code(code_data)
+        after_commit(self.auth_db.session, wake_email_outbox_relay)
+        await self.auth_db.create_email_outbox_message({"email_to": user.email, "code": code, "action": action})
 
-    async def get_verify_code(self, verify_code_data: dict) -> VerifyCode | None:
-        return await self.auth_db.get_verify_code(verify_code_data)
+    async def pop_verify_code(self, user: User, code: str, action: Action) -> VerifyCode | None:
+        return await self.verify_code_db.pop_verify_code(user.id, code, action)
 
     async def delete_users_verify_codes(self, user: User):
-        await self.auth_db.delete_users_verify_codes(user)
+        await self.verify_code_db.delete_users_verify_codes(user)
 
     async def generate_tokens(self, user: User) -> dict:
         access_token = self._create_access_token(user)
         refresh_token = self._generate_unique_string()
         refresh_token_data = {
             "user_id": user.id,
-            "token": refresh_token,
+            "token_hash": self._hash_token(refresh_token),
             "expires_at": datetime.datetime.now() + datetime.timedelta(days=30)
         }
         await self.auth_db.create_refresh_token(refresh_token_data)
@@ -73,11 +84,8 @@ class AuthService:
         }
         return tokens
 
-    async def get_refresh_token(self, refresh_token: str) -> RefreshToken | None:
-        return await self.auth_db.get_refresh_token(refresh_token)
-
-    async def delete_refresh_token(self, refresh_token: RefreshToken) -> None:
-        return await self.auth_db.delete_refresh_token(refresh_token)
+    async def pop_refresh_token(self, refresh_token: str) -> RefreshToken | None:
+        return await self.auth_db.pop_refresh_token(self._hash_token(refresh_token))
 
     @staticmethod
     def _create_access_token(user: User) -> str | None:
@@ -88,6 +96,10 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, settings.SECRET, algorithm=settings.ALGORITHM)
         return encoded_jwt
 
+    @staticmethod
+    def _hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
     @classmethod
     def _generate_unique_string(cls, byte: int = 64) -> str:
         return secrets.token_urlsafe(byte)
@@ -98,5 +110,8 @@ class AuthService:
         return ''.join(random.choice(letters) for _ in range(6))
 
 
-async def get_auth_service(user_db: AuthRepository = Depends(get_auth_repository)):
-    yield AuthService(user_db)
+async def get_auth_service(
+        user_db: AuthRepository = Depends(get_auth_repository),
+        verify_code_db: AuthRepository | RedisVerifyCodeRepository = Depends(get_verify_code_repository),
+):
+    yield AuthService(user_db, verify_code_db)
@@ -1,14 +1,32 @@
 import datetime
+import hashlib
+import time
 
 from fastapi import Depends, Header
 from jose import JWTError, jwt
 
 from app.auth.models import User
 from app.auth.repositories import AuthRepository, get_auth_repository
+from app.cache import LocalCache
 from app.config import settings
 
+token_cache = LocalCache(settings.TOKEN_CACHE_SIZE)
+
 
 def parse_token(token: str) -> dict | None:
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    token_data = token_cache.get(token_key)
+    if token_data:
+        return token_data
+    token_data = _decode_token(token)
+    if token_data and token_data["exp"]:
+        ttl = token_data["exp"] - time.time()
+        if ttl > 0:
+            token_cache.set(token_key, token_data, expires_at=time.monotonic() + ttl)
+    return token_data
+
+
+def _decode_token(token: str) -> dict | None:
     try:
         payload = jwt.decode(token, settings.SECRET, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+redis_client = aioredis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+
+class LocalCache:
+    """In-process LRU cache whose entries expire after ``ttl`` seconds or at an explicit deadline."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float | None, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float | None = None) -> None:
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """JSON values cached in process first and in Redis second.
+
+    The local tier uses a short TTL because invalidations only reach the
+    shared Redis tier; other workers see a change once their local entry
+    expires. Redis failures degrade to a miss instead of failing the request.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            ttl: int,
+            local_ttl: float,
+            local_maxsize: int,
+            client: aioredis.Redis = redis_client,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LocalCache(local_maxsize, local_ttl)
+        self.client = client
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> dict | None:
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        try:
+            raw = await self.client.get(self._redis_key(key))
+        except RedisError:
+            logger.warning("Redis unavailable, %s cache lookup skipped", self.namespace, exc_info=True)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        self.local.set(key, value)
+        try:
+            await self.client.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+        except RedisError:
+            logger.warning("Redis unavailable, %s cache write skipped", self.namespace, exc_info=True)
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        try:
+            await self.client.delete(self._redis_key(key))
+        except RedisError:
+            logger.warning("Redis unavailable, %s cache invalidation skipped", self.namespace, exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "local_size": len(self.local),
+        }
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+
+@dataclass(frozen=True)
+class Version:
+    number: int
+    modified: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.number}"'
+
+
+class CollectionVersion:
+    """Change counter of a table, kept in a Redis hash, for conditional GETs of its listings.
+
+    A missing hash starts from the current time in microseconds instead of zero, so the counter
+    keeps growing across a Redis flush and an old ETag cannot match newer data. The hash expires
+    ``ttl`` seconds after the last change, which bounds how long a bump lost to a Redis error can
+    leave clients with a stale listing. Redis failures make ``get`` return None, i.e. no ETag.
+    """
+
+    get_script = """
+    if redis.call('HSETNX', KEYS[1], 'version', ARGV[1]) == 1 then
+        redis.call('HSET', KEYS[1], 'modified', ARGV[2])
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+    end
+    return redis.call('HMGET', KEYS[1], 'version', 'modified')
+    """
+    bump_script = """
+    redis.call('HSETNX', KEYS[1], 'version', ARGV[1])
+    redis.call('HINCRBY', KEYS[1], 'version', 1)
+    redis.call('HSET', KEYS[1], 'modified', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    """
+
+    def __init__(self, name: str, ttl: int, client: aioredis.Redis = redis_client):
+        self.key = f"collection_version:{name}"
+        self.ttl = ttl
+        self._get = client.register_script(self.get_script)
+        self._bump = client.register_script(self.bump_script)
+
+    async def get(self) -> Version | None:
+        try:
+            number, modified = await self._get(keys=[self.key], args=self._args())
+        except RedisError:
+            logger.warning("Redis unavailable, %s version lookup skipped", self.key, exc_info=True)
+            return None
+        return Version(int(number), float(modified))
+
+    async def bump(self) -> None:
+        try:
+            await self._bump(keys=[self.key], args=self._args())
+        except RedisError:
+            logger.warning("Redis unavailable, %s version bump lost", self.key, exc_info=True)
+
+    def _args(self) -> list:
+        now = time.time()
+        return [int(now * 1_000_000), now, self.ttl]
+
+
+class SingleFlightCache:
+    """Serialized payloads in Redis with a TTL, loaded by one caller at a time per key.
+
+    Concurrent misses for a key within the process share a single load; if the caller running it is
+    cancelled, one of the others starts it again. Across processes the caller that takes a short Redis
+    lock loads and stores the value while the others poll for it; if the lock holder gives up or
+    ``lock_timeout`` passes, they load it themselves rather than fail. Redis failures degrade to
+    loading without the cache.
+    """
+
+    release_script = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+    poll_interval = 0.05
+
+    def __init__(self, namespace: str, ttl: int, lock_timeout: float, client: aioredis.Redis = redis_client):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.client = client
+        self._release = client.register_script(self.release_script)
+        self._loads: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        while (shared := self._loads.get(key)) is not None:
+            self.waits += 1
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                # Only the loading caller was cancelled; take over the load instead of failing with it.
+                if not shared.cancelled():
+                    raise
+        shared = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it; mark a failure as retrieved so asyncio does not log it again.
+        shared.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._loads[key] = shared
+        try:
+            value = await self._get_or_load(key, load)
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as exc:
+            shared.set_exception(exc)
+            raise
+        finally:
+            del self._loads[key]
+        shared.set_result(value)
+        return value
+
+    async def _get_or_load(self, key: str, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        redis_key = f"{self.namespace}:{key}"
+        lock_key = f"{redis_key}:lock"
+        token = None
+        try:
+            value = await self.client.get(redis_key)
+            if value is not None:
+                self.hits += 1
+                return value
+            token = uuid.uuid4().hex
+            if not await self.client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)):
+                token = None
+                value = await self._wait(redis_key, lock_key)
+                if value is not None:
+                    self.waits += 1
+                    return value
+        except RedisError:
+            logger.warning("Redis unavailable, %s cache lookup skipped", self.namespace, exc_info=True)
+            self.misses += 1
+            return await load()
+        self.misses += 1
+        try:
+            value = await load()
+            await self.client.set(redis_key, value, ex=self.ttl)
+        except RedisError:
+            logger.warning("Redis unavailable, %s cache write skipped", self.namespace, exc_info=True)
+        finally:
+            if token is not None:
+                await self._release_lock(lock_key, token)
+        return value
+
+    async def _wait(self, redis_key: str, lock_key: str) -> bytes | None:
+        """The value stored by the lock holder, or None once it released the lock without one or timed out."""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = await self.client.get(redis_key)
+            if value is not None or not await self.client.exists(lock_key):
+                return value
+        return None
+
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        try:
+            await self._release(keys=[lock_key], args=[token])
+        except RedisError:
+            logger.warning("Redis unavailable, %s lock left to expire", self.namespace, exc_info=True)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "waits": self.waits, "misses": self.misses, "loading": len(self._loads)}
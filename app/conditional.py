@@ -0,0 +1,55 @@
+import time
+from email.utils import formatdate
+
+from fastapi import Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import CollectionVersion, Version
+from app.config import settings
+from app.database import get_async_session, replica_engine, use_primary
+
+
+def collection_version(versions: CollectionVersion):
+    """Route dependency reading the collection's current version before the listing query runs.
+
+    Reading it first means a concurrent write can only make the ETag older than the data, never newer.
+    A version that changed within DB_REPLICA_MAX_LAG also keeps the request on the primary, so a
+    lagging replica cannot serve the old rows under the new ETag.
+    """
+
+    async def get_collection_version(session: AsyncSession = Depends(get_async_session)) -> Version | None:
+        version = await versions.get()
+        if version and replica_engine is not None and time.time() - version.modified < settings.DB_REPLICA_MAX_LAG:
+            use_primary(session)
+        return version
+
+    return get_collection_version
+
+
+def version_headers(version: Version | None) -> dict[str, str]:
+    """ETag and Last-Modified, with no-cache so that clients revalidate instead of guessing a freshness lifetime."""
+    if version is None:
+        return {}
+    return {
+        "ETag": version.etag,
+        "Last-Modified": formatdate(version.modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def is_not_modified(request: Request, version: Version | None) -> bool:
+    """Whether If-None-Match matches the version (weak comparison, as for any GET).
+
+    If-Modified-Since is not honoured: its one-second resolution would hide changes made within the
+    same second as the client's copy.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if version is None or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == version.etag for tag in if_none_match.split(","))
+
+
+def not_modified(version: Version) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=version_headers(version))
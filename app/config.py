@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,16 +14,66 @@ class Settings(BaseSettings):
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    DB_REPLICA_URL: str | None = None
+    DB_UNIT_OF_WORK: bool = True
+    DB_SLOW_QUERY_THRESHOLD: float = 0.5
+    DB_QUERY_STATS_HEADERS: bool = False
+    DB_QUERY_BUDGET_STRICT: bool = False
+    DB_REPLICA_MAX_LAG: float = 5
+
     REDIS_HOST: str
     REDIS_PORT: int
 
+    USER_CACHE_TTL: int = 300
+    USER_CACHE_LOCAL_TTL: float = 5
+    USER_CACHE_LOCAL_SIZE: int = 10000
+
+    COLLECTION_VERSION_TTL: int = 3600
+    LIST_CACHE_TTL: int = 60
+    LIST_CACHE_LOCK_TIMEOUT: float = 5
+
+    VERIFY_CODE_BACKEND: Literal["redis", "sql"] = "redis"
+
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_ROUTE_LIMITS: dict[str, int] = {
+        "GET /devices/": 16,
+        "GET /devices/terminals": 16,
+        "GET /devices/{device_id}/terminals": 16,
+        "GET /auth/users": 8,
+        "POST /devices/batch": 4,
+        "POST /devices/terminals/import": 2,
+    }
+    ADMISSION_QUEUE_SIZE: int = 128
+    ADMISSION_QUEUE_TIMEOUT: float = 5
+    ADMISSION_POOL_WAIT_THRESHOLD: float = 0.5
+    ADMISSION_RETRY_AFTER: int = 2
+
+    TERMINAL_IMPORT_CHUNK_SIZE: int = 5000
+    TERMINAL_IMPORT_MAX_ERRORS: int = 100
+
+    HEARTBEAT_FLUSH_INTERVAL: float = 5
+    HEARTBEAT_BATCH_SIZE: int = 1000
+    HEARTBEAT_CLAIM_TTL: int = 3600
+
+    EMAIL_OUTBOX_RELAY_INTERVAL: float = 1
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+
+    PURGE_EXPIRED_INTERVAL: float = 3600
+    PURGE_EXPIRED_BATCH_SIZE: int = 1000
+    PURGE_EXPIRED_MAX_BATCHES: int = 1000
+
     SMTP_HOST: str
     SMTP_PORT: int
     SMTP_USER: str
     SMTP_PASS: str
+    SMTP_SSL: bool = True
+    SMTP_TIMEOUT: float = 30
+    SMTP_POOL_SIZE: int = 2
+    SMTP_HEALTH_CHECK_AFTER: float = 30
 
     SECRET: str
     ALGORITHM: str
+    TOKEN_CACHE_SIZE: int = 10000
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,12 +1,131 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+import time
+from typing import Awaitable, Callable
+
+from fastapi import Depends
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECTIONS
+from app.query_stats import after_cursor_execute, before_cursor_execute
 
 DB_URL = settings.DB_URL
 
-engine = create_async_engine(DB_URL)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+USE_PRIMARY_KEY = "use_primary"
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long every checkout waited for a connection.
+
+    It also keeps the start of every checkout still waiting, so ``checkout_wait`` sees a stalled pool
+    before any of those checkouts completes.
+    """
+
+    # How long the last completed checkout keeps counting once nothing is waiting.
+    recent_wait_ttl = 1.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiting: dict[object, float] = {}
+        self._last_wait = 0.0
+        self._last_wait_at = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        checkout = object()
+        self._waiting[checkout] = started
+        try:
+            return super()._do_get()
+        finally:
+            del self._waiting[checkout]
+            self._last_wait_at = time.perf_counter()
+            self._last_wait = self._last_wait_at - started
+            DB_POOL_CHECKOUT_WAIT.labels(self.logging_name).observe(self._last_wait)
+
+    def checkout_wait(self) -> float:
+        """Seconds the oldest pending checkout has waited, or the last one took if it completed just now."""
+        now = time.perf_counter()
+        oldest = next(iter(self._waiting.values()), None)
+        wait = now - oldest if oldest is not None else 0.0
+        if now - self._last_wait_at < self.recent_wait_ttl:
+            wait = max(wait, self._last_wait)
+        return wait
+
+
+async def set_type_codecs(connection) -> None:
+    """asyncpg only reads and writes macaddr as text, but COPY needs a binary codec."""
+    await connection.set_type_codec(
+        "macaddr",
+        schema="pg_catalog",
+        encoder=lambda value: bytes.fromhex(value.replace(":", "")),
+        decoder=lambda value: value.hex(":"),
+        format="binary",
+    )
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    dbapi_connection.run_async(set_type_codecs)
+
+
+def create_instrumented_engine(url: str, name: str) -> AsyncEngine:
+    """Engine whose pool and statements are reported under ``name`` in metrics and per-request query stats."""
+    new_engine = create_async_engine(url, poolclass=InstrumentedPool, pool_logging_name=name)
+    pool = new_engine.pool
+    DB_POOL_CONNECTIONS.labels(name, "size").set_function(pool.size)
+    DB_POOL_CONNECTIONS.labels(name, "checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(name, "idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(name, "overflow").set_function(lambda: max(pool.overflow(), 0))
+    event.listen(new_engine.sync_engine, "connect", _on_connect)
+    event.listen(new_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    return new_engine
+
+
+engine = create_instrumented_engine(DB_URL, "primary")
+replica_engine = create_instrumented_engine(settings.DB_REPLICA_URL, "replica") if settings.DB_REPLICA_URL else None
+
+
+def pool_checkout_wait() -> float:
+    """Checkout wait of the busiest engine's pool, see ``InstrumentedPool.checkout_wait``."""
+    return max(pool_engine.pool.checkout_wait() for pool_engine in (engine, replica_engine) if pool_engine is not None)
+
+
+class RoutingSession(Session):
+    """Sends SELECTs to the replica and everything else to the primary.
+
+    Once the session writes, or ``use_primary`` is called, it stays on the primary so the rest of the
+    request reads its own writes instead of a lagging replica. A single statement wrapped in ``on_primary``
+    goes to the primary without pinning the session; a top-level ``SELECT ... FOR UPDATE`` must be wrapped
+    this way, since routing only looks at public statement attributes. A flush asks for its connection
+    without a statement, which pins the session like any other write.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if replica_engine is None or self.info.get(USE_PRIMARY_KEY):
+            return engine.sync_engine
+        if isinstance(clause, Select):
+            if clause.get_execution_options().get(USE_PRIMARY_KEY):
+                return engine.sync_engine
+            return replica_engine.sync_engine
+        self.info[USE_PRIMARY_KEY] = True
+        return engine.sync_engine
+
+
+def _drop_after_commit(session: Session, previous_transaction) -> None:
+    # Callbacks belong to the transaction that registered them, never to one the session starts later.
+    if not previous_transaction.nested:
+        session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+event.listen(RoutingSession, "after_soft_rollback", _drop_after_commit)
+
+async_session_maker = async_sessionmaker(
+    engine, expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutingSession
+)
+
+AFTER_COMMIT_KEY = "after_commit"
 
 
 class Base(DeclarativeBase):
@@ -16,3 +135,39 @@ class Base(DeclarativeBase):
 async def get_async_session() -> AsyncSession | None:
     async with async_session_maker() as session:
         yield session
+        if settings.DB_UNIT_OF_WORK:
+            await commit(session)
+
+
+async def commit(session: AsyncSession) -> None:
+    await session.commit()
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        await callback()
+
+
+async def save(session: AsyncSession) -> None:
+    """Flush pending changes in unit-of-work mode, where the request commits once at the end; commit otherwise."""
+    if settings.DB_UNIT_OF_WORK:
+        await session.flush()
+    else:
+        await commit(session)
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable]) -> None:
+    """Run ``callback`` once the session commits; it is dropped if the transaction rolls back."""
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+def on_primary(statement: Select) -> Select:
+    """Run this one read on the primary without moving the rest of the session there."""
+    return statement.execution_options(**{USE_PRIMARY_KEY: True})
+
+
+def use_primary(session: AsyncSession) -> None:
+    """Read from the primary for the rest of this session, e.g. right after another request wrote."""
+    session.info[USE_PRIMARY_KEY] = True
+
+
+async def read_your_writes(session: AsyncSession = Depends(get_async_session)) -> None:
+    """Route dependency keeping the whole request on the primary."""
+    use_primary(session)
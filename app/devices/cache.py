@@ -0,0 +1,13 @@
+from app.cache import CollectionVersion, SingleFlightCache
+from app.config import settings
+
+device_version = CollectionVersion("device", ttl=settings.COLLECTION_VERSION_TTL)
+terminal_version = CollectionVersion("terminal", ttl=settings.COLLECTION_VERSION_TTL)
+
+# Keys include the collection version, so the bump after every write in DeviceRepository retires all cached pages.
+device_list_cache = SingleFlightCache(
+    "device_list", ttl=settings.LIST_CACHE_TTL, lock_timeout=settings.LIST_CACHE_LOCK_TIMEOUT
+)
+terminal_list_cache = SingleFlightCache(
+    "terminal_list", ttl=settings.LIST_CACHE_TTL, lock_timeout=settings.LIST_CACHE_LOCK_TIMEOUT
+)
@@ -0,0 +1,33 @@
+from fastapi import status
+
+from app.auth.exceptions import DetailedHTTPException
+
+
+class IpAddressTakenException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Device with this ip address exists"
+
+
+class MacAddressTakenException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Terminal with this MAC address exists"
+
+
+class NoSuchDeviceException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_404_NOT_FOUND
+    DETAIL = "No such device"
+
+
+class NoSuchTerminalException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_404_NOT_FOUND
+    DETAIL = "No terminal with this MAC address"
+
+
+class UnsupportedImportFormatException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    DETAIL = "Import body must be text/csv or application/x-ndjson"
+
+
+class InvalidImportEncodingException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Import body must be UTF-8 encoded"
@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+from uuid import UUID
+
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from app.cache import redis_client
+from app.config import settings
+from app.database import async_session_maker, commit
+from app.devices.repositories import DeviceRepository
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    """Latest pull time per terminal, kept in one Redis hash until the flusher writes it to Postgres.
+
+    A flush claims the whole hash with an atomic RENAME, so heartbeats that arrive meanwhile go to a fresh
+    hash and several app processes can run the flusher without writing the same batch twice. The claimed
+    hash expires after HEARTBEAT_CLAIM_TTL, so a process killed mid-flush does not leave it behind for good.
+    """
+
+    key = "terminal_heartbeats"
+
+    # Puts unflushed pulls back unless a newer heartbeat for the terminal arrived in the meantime.
+    requeue_script = """
+    local pulls = redis.call('HGETALL', KEYS[2])
+    for i = 1, #pulls, 2 do
+        redis.call('HSETNX', KEYS[1], pulls[i], pulls[i + 1])
+    end
+    redis.call('DEL', KEYS[2])
+    """
+
+    def __init__(self, client: aioredis.Redis):
+        self.client = client
+        self._requeue = client.register_script(self.requeue_script)
+
+    async def record(self, terminal_id: UUID, pulled_at: datetime.datetime) -> None:
+        await self.client.hset(self.key, str(terminal_id), pulled_at.isoformat())
+
+    async def claim(self) -> tuple[str, dict[UUID, datetime.datetime]]:
+        claimed_key = f"{self.key}:flushing:{uuid.uuid4()}"
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.rename(self.key, claimed_key)
+                pipe.expire(claimed_key, settings.HEARTBEAT_CLAIM_TTL)
+                await pipe.execute()
+        except ResponseError:
+            return claimed_key, {}
+        pulls = await self.client.hgetall(claimed_key)
+        return claimed_key, {
+            UUID(terminal_id.decode()): datetime.datetime.fromisoformat(pulled_at.decode())
+            for terminal_id, pulled_at in pulls.items()
+        }
+
+    async def release(self, claimed_key: str) -> None:
+        await self.client.delete(claimed_key)
+
+    async def requeue(self, claimed_key: str, pulls: dict[UUID, datetime.datetime]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(claimed_key)
+            pipe.hset(claimed_key, mapping={str(key): value.isoformat() for key, value in pulls.items()})
+            pipe.expire(claimed_key, settings.HEARTBEAT_CLAIM_TTL)
+            await pipe.execute()
+        await self._requeue(keys=[self.key, claimed_key])
+
+
+heartbeat_buffer = HeartbeatBuffer(redis_client)
+
+
+class HeartbeatStats:
+    def __init__(self):
+        self.flushes = 0
+        self.last_batch_size = 0
+        self.last_flush_size = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+heartbeat_stats = HeartbeatStats()
+
+
+async def flush_heartbeats(buffer: HeartbeatBuffer = heartbeat_buffer) -> int:
+    """Write buffered pulls in batches of HEARTBEAT_BATCH_SIZE, one UPDATE and commit per batch."""
+    claimed_key, pulls = await buffer.claim()
+    if not pulls:
+        return 0
+    pending = list(pulls.items())
+    batch_size = settings.HEARTBEAT_BATCH_SIZE
+    flushed = 0
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = dict(pending[start:start + batch_size])
+            async with async_session_maker() as session:
+                await DeviceRepository(session).update_terminals_last_pull(batch)
+                await commit(session)
+            flushed += len(batch)
+            heartbeat_stats.last_batch_size = len(batch)
+    except BaseException:
+        # Cancellation too, or the claimed batch would be stranded until its key expires.
+        await buffer.requeue(claimed_key, dict(pending[flushed:]))
+        raise
+    await buffer.release(claimed_key)
+    lag = (datetime.datetime.now() - min(pulls.values())).total_seconds()
+    heartbeat_stats.flushes += 1
+    heartbeat_stats.last_flush_size = flushed
+    heartbeat_stats.last_lag = lag
+    heartbeat_stats.max_lag = max(heartbeat_stats.max_lag, lag)
+    logger.info("Flushed %s terminal heartbeats, oldest waited %.1fs", flushed, lag)
+    return flushed
+
+
+async def run_heartbeat_flusher(stop: asyncio.Event) -> None:
+    """Flush every HEARTBEAT_FLUSH_INTERVAL until ``stop`` is set, never leaving a flush half done."""
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            await flush_heartbeats()
+        except Exception:
+            logger.exception("Terminal heartbeat flush failed, retrying next interval")
+        try:
+            await asyncio.wait_for(
+                stop.wait(), max(settings.HEARTBEAT_FLUSH_INTERVAL - (time.monotonic() - started), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
@@ -1,8 +1,10 @@
 import datetime
 import uuid
+from ipaddress import IPv4Address, IPv6Address
 from typing import Annotated
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.dialects.postgresql import INET, MACADDR
 from sqlalchemy.orm import mapped_column, Mapped
 
 from app.database import Base
@@ -14,7 +16,7 @@ class Device(Base):
     __tablename__ = "device"
 
     id: Mapped[uuid_pk]
-    ip_address: Mapped[str]
+    ip_address: Mapped[IPv4Address | IPv6Address] = mapped_column(INET, unique=True, index=True)
     description: Mapped[str] = mapped_column(nullable=True)
 
 
@@ -22,7 +24,12 @@ class Terminal(Base):
     __tablename__ = "terminal"
     id: Mapped[uuid_pk]
     device_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("device.id", ondelete="cascade"))
-    mac_address: Mapped[str]
+    mac_address: Mapped[str] = mapped_column(MACADDR, unique=True, index=True)
     model: Mapped[str]
     date_created: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.now())
     date_last_pull: Mapped[datetime.datetime] = mapped_column(nullable=True)
+
+    __table_args__ = (
+        # Serves the foreign key (cascade deletes) and keyset pages of one device's terminals.
+        Index("ix_terminal_device_id_id", "device_id", "id"),
+    )
@@ -1,48 +1,171 @@
+import datetime
+import uuid
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import select, delete
+from sqlalchemy import DateTime, Row, Uuid, any_, bindparam, delete, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, INET, MACADDR, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_async_session
+from app.cache import CollectionVersion
+from app.database import after_commit, get_async_session, save
+from app.devices.cache import device_version, terminal_version
 from app.devices.models import Terminal, Device
 
 
 class DeviceRepository:
     device_table = Device
     terminal_table = Terminal
+    # Columns of DeviceInfoSchema and TerminalInfoSchema, in field order, for listings that skip the ORM.
+    device_list_columns = (Device.ip_address, Device.description, Device.id)
+    terminal_list_columns = (Terminal.device_id, Terminal.mac_address, Terminal.model, Terminal.id)
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_devices(self) -> list[Device] | None:
-        statement = select(self.device_table)
+    async def get_devices(self, limit: int, after: UUID | None = None) -> list[Row]:
+        statement = select(*self.device_list_columns).order_by(self.device_table.id).limit(limit)
+        if after:
+            statement = statement.where(self.device_table.id > after)
         result = await self.session.execute(statement)
-        return result.scalars()
+        return list(result)
 
-    async def create_device(self, device_data: dict) -> Device:
-        device = self.device_table(**device_data)
-        self.session.add(device)
-        await self.session.commit()
-        await self.session.refresh(device)
+    async def create_device(self, device_data: dict) -> Device | None:
+        """Insert the device, or return None when its ip address exists; a race or lagging replica cannot slip past."""
+        statement = (
+            insert(self.device_table)
+            .values(**device_data)
+            .on_conflict_do_nothing(index_elements=[self.device_table.ip_address])
+            .returning(self.device_table)
+        )
+        result = await self.session.execute(statement)
+        device = result.scalar_one_or_none()
+        if device is not None:
+            self._bump_version(device_version)
+            await save(self.session)
         return device
 
-    async def get_terminals(self) -> list[Terminal] | None:
-        statement = select(self.terminal_table)
+    async def create_devices(self, devices_data: list[dict]) -> list[Device]:
+        """Insert all devices with one multi-row INSERT ... RETURNING, leaving the commit to ``save``.
+
+        Rows whose ip address already exists, in the table or earlier in the batch, are skipped and not returned.
+        RETURNING order is not guaranteed, so the result is put back into input order by the client-side ids.
+        """
+        devices_data = [{"id": uuid.uuid4(), **device_data} for device_data in devices_data]
+        statement = (
+            insert(self.device_table)
+            .values(devices_data)
+            .on_conflict_do_nothing(index_elements=[self.device_table.ip_address])
+            .returning(self.device_table)
+        )
+        result = await self.session.execute(statement)
+        devices = {device.id: device for device in result.scalars()}
+        if devices:
+            self._bump_version(device_version)
+        return [devices[device_data["id"]] for device_data in devices_data if device_data["id"] in devices]
+
+    async def get_device_by_id(self, device_id: UUID) -> Device | None:
+        return await self.session.get(self.device_table, device_id)
+
+    async def get_device_by_ip_address(self, ip_address: str) -> Device | None:
+        # Plain str binds are sent as varchar, which cannot be compared with inet.
+        statement = select(self.device_table).where(self.device_table.ip_address == literal(ip_address, INET))
+        result = await self.session.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def get_terminals(self, limit: int, after: UUID | None = None) -> list[Row]:
+        statement = select(*self.terminal_list_columns).order_by(self.terminal_table.id).limit(limit)
+        if after:
+            statement = statement.where(self.terminal_table.id > after)
+        result = await self.session.execute(statement)
+        return list(result)
+
+    async def get_device_terminals(self, device_id: UUID, limit: int, after: UUID | None = None) -> list[Row]:
+        statement = (
+            select(*self.terminal_list_columns)
+            .where(self.terminal_table.device_id == device_id)
+            .order_by(self.terminal_table.id)
+            .limit(limit)
+        )
+        if after:
+            statement = statement.where(self.terminal_table.id > after)
+        result = await self.session.execute(statement)
+        return list(result)
+
+    async def get_terminal_by_mac_address(self, mac_address: str) -> Terminal | None:
+        statement = select(self.terminal_table).where(self.terminal_table.mac_address == literal(mac_address, MACADDR))
         result = await self.session.execute(statement)
-        return result.scalars()
+        return result.scalar_one_or_none()
 
-    async def create_terminal(self, terminal_data: dict) -> Terminal:
-        terminal = self.terminal_table(**terminal_data)
-        self.session.add(terminal)
-        await self.session.commit()
-        await self.session.refresh(terminal)
+    async def create_terminal(self, terminal_data: dict) -> Terminal | None:
+        """Insert the terminal, or return None when its MAC address exists, like ``create_device``."""
+        statement = (
+            insert(self.terminal_table)
+            .values(**terminal_data)
+            .on_conflict_do_nothing(index_elements=[self.terminal_table.mac_address])
+            .returning(self.terminal_table)
+        )
+        result = await self.session.execute(statement)
+        terminal = result.scalar_one_or_none()
+        if terminal is not None:
+            self._bump_version(terminal_version)
+            await save(self.session)
         return terminal
 
+    async def copy_terminals(self, records: list[tuple]) -> int:
+        """COPY ``records`` into terminal on the session's connection, leaving the commit to ``save``.
+
+        The driver transaction opens on the first statement, so a query must run in this session before the copy.
+        """
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            self.terminal_table.__tablename__,
+            records=records,
+            columns=["id", "device_id", "mac_address", "model", "date_created"],
+        )
+        self._bump_version(terminal_version)
+        return len(records)
+
+    async def get_existing_device_ids(self, device_ids: set[UUID]) -> set[UUID]:
+        statement = select(self.device_table.id).where(self.device_table.id.in_(device_ids))
+        result = await self.session.execute(statement)
+        return set(result.scalars())
+
+    async def get_existing_mac_addresses(self, mac_addresses: set[str]) -> set[str]:
+        statement = select(self.terminal_table.mac_address).where(
+            self.terminal_table.mac_address == any_(literal(list(mac_addresses), ARRAY(MACADDR)))
+        )
+        result = await self.session.execute(statement)
+        return set(result.scalars())
+
+    async def update_terminals_last_pull(self, pulls: dict[UUID, datetime.datetime]) -> int:
+        """Apply many heartbeats with a single UPDATE joined against unnest()ed arrays; never moves a pull back."""
+        statement = text(
+            "UPDATE terminal SET date_last_pull = GREATEST(terminal.date_last_pull, pulls.pulled_at) "
+            "FROM unnest(:terminal_ids, :pulled_at) AS pulls (terminal_id, pulled_at) "
+            "WHERE terminal.id = pulls.terminal_id"
+        ).bindparams(
+            bindparam("terminal_ids", type_=ARRAY(Uuid)),
+            bindparam("pulled_at", type_=ARRAY(DateTime)),
+        )
+        result = await self.session.execute(
+            statement, {"terminal_ids": list(pulls), "pulled_at": list(pulls.values())}
+        )
+        await save(self.session)
+        return result.rowcount
+
+    async def save(self) -> None:
+        await save(self.session)
+
     async def delete_terminal(self, terminal_id: UUID) -> None:
         statement = delete(self.terminal_table).where(self.terminal_table.id == terminal_id)
         await self.session.execute(statement)
-        await self.session.commit()
+        self._bump_version(terminal_version)
+        await save(self.session)
+
+    def _bump_version(self, version: CollectionVersion) -> None:
+        after_commit(self.session, version.bump)
 
 
 async def get_device_repository(session: AsyncSession = Depends(get_async_session)):
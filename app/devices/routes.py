@@ -1,26 +1,52 @@
+import datetime
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, status
 
 from app.auth.exceptions import PermissionDeniedException
 from app.auth.models import User
 from app.auth.utils import get_current_user
-from app.devices.schemas import DeviceInfoSchema, DeviceCreateSchema, TerminalInfoSchema, TerminalCreateSchema
+from app.cache import Version
+from app.conditional import collection_version, is_not_modified, not_modified, version_headers
+from app.database import read_your_writes
+from app.devices.cache import device_version, terminal_version
+from app.devices.exceptions import NoSuchDeviceException, NoSuchTerminalException
+from app.devices.heartbeats import heartbeat_buffer
+from app.devices.schemas import (
+    MAX_DEVICE_BATCH_SIZE,
+    DeviceCreateSchema,
+    DeviceInfoSchema,
+    IpAddress,
+    MacAddress,
+    TerminalCreateSchema,
+    TerminalImportSchema,
+    TerminalInfoSchema,
+)
 from app.devices.services import DeviceService, get_device_service
+from app.devices.utils import iter_import_rows
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageResponse, PageSchema, decode_cursor
 
 router = APIRouter(
     prefix="/devices"
 )
 
 
-@router.get("/")
+@router.get("/", response_model=PageSchema[DeviceInfoSchema])
 async def get_devices(
+        request: Request,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: str | None = None,
         user: User | None = Depends(get_current_user),
+        version: Version | None = Depends(collection_version(device_version)),
         device_service: DeviceService = Depends(get_device_service)
-) -> list[DeviceInfoSchema]:
+) -> PageResponse:
     if not user:
         raise PermissionDeniedException
-    return await device_service.get_devices()
+    if is_not_modified(request, version):
+        return not_modified(version)
+    devices = await device_service.get_devices(limit, decode_cursor(after), version)
+    return PageResponse(devices, headers=version_headers(version))
 
 
 @router.post("/")
@@ -35,14 +61,78 @@ async def create_device(
     return await device_service.create_device(device_data)
 
 
-@router.get("/terminals")
+@router.get("/by-ip/{ip_address}")
+async def get_device_by_ip_address(
+        ip_address: IpAddress,
+        user: User | None = Depends(get_current_user),
+        device_service: DeviceService = Depends(get_device_service)
+) -> DeviceInfoSchema:
+    if not user:
+        raise PermissionDeniedException
+    device = await device_service.get_device_by_ip_address(ip_address)
+    if not device:
+        raise NoSuchDeviceException
+    return device
+
+
+@router.get("/{device_id}/terminals", response_model=PageSchema[TerminalInfoSchema])
+async def get_device_terminals(
+        device_id: UUID,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: str | None = None,
+        user: User | None = Depends(get_current_user),
+        device_service: DeviceService = Depends(get_device_service)
+) -> PageResponse:
+    if not user:
+        raise PermissionDeniedException
+    terminals = await device_service.get_device_terminals(device_id, limit, decode_cursor(after))
+    if terminals is None:
+        raise NoSuchDeviceException
+    return PageResponse(terminals)
+
+
+@router.post("/batch")
+async def create_devices(
+        devices: Annotated[list[DeviceCreateSchema], Body(min_length=1, max_length=MAX_DEVICE_BATCH_SIZE)],
+        skip_duplicates: bool = False,
+        user: User | None = Depends(get_current_user),
+        device_service: DeviceService = Depends(get_device_service)
+) -> list[DeviceInfoSchema]:
+    if not user:
+        raise PermissionDeniedException
+    devices_data = [device.model_dump() for device in devices]
+    return await device_service.create_devices(devices_data, skip_duplicates)
+
+
+@router.get("/terminals", response_model=PageSchema[TerminalInfoSchema])
 async def get_terminals(
+        request: Request,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: str | None = None,
         user: User | None = Depends(get_current_user),
+        version: Version | None = Depends(collection_version(terminal_version)),
         device_service: DeviceService = Depends(get_device_service)
-) -> list[TerminalInfoSchema]:
+) -> PageResponse:
     if not user:
         raise PermissionDeniedException
-    return await device_service.get_terminals()
+    if is_not_modified(request, version):
+        return not_modified(version)
+    terminals = await device_service.get_terminals(limit, decode_cursor(after), version)
+    return PageResponse(terminals, headers=version_headers(version))
+
+
+@router.get("/terminals/by-mac/{mac_address}")
+async def get_terminal_by_mac_address(
+        mac_address: MacAddress,
+        user: User | None = Depends(get_current_user),
+        device_service: DeviceService = Depends(get_device_service)
+) -> TerminalInfoSchema:
+    if not user:
+        raise PermissionDeniedException
+    terminal = await device_service.get_terminal_by_mac_address(mac_address)
+    if not terminal:
+        raise NoSuchTerminalException
+    return terminal
 
 
 @router.post("/terminals")
@@ -57,6 +147,29 @@ async def create_terminal(
     return await device_service.create_terminal(terminal_data)
 
 
+@router.post("/terminals/import", dependencies=[Depends(read_your_writes)])
+async def import_terminals(
+        request: Request,
+        content_type: str = Header(...),
+        user: User | None = Depends(get_current_user),
+        device_service: DeviceService = Depends(get_device_service)
+) -> TerminalImportSchema:
+    if not user:
+        raise PermissionDeniedException
+    rows = iter_import_rows(request.stream(), content_type)
+    return await device_service.import_terminals(rows)
+
+
+@router.post("/terminals/{terminal_id}/heartbeat", status_code=status.HTTP_202_ACCEPTED)
+async def terminal_heartbeat(
+        terminal_id: UUID,
+        user: User | None = Depends(get_current_user),
+) -> None:
+    if not user:
+        raise PermissionDeniedException
+    await heartbeat_buffer.record(terminal_id, datetime.datetime.now())
+
+
 @router.delete("/terminals/{terminal_id}")
 async def delete_terminal(
         terminal_id: UUID,
@@ -1,21 +1,54 @@
+import ipaddress
 import re
-from typing import Optional
+from typing import Annotated, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, BeforeValidator
+
+MAX_DEVICE_BATCH_SIZE = 1000
+
+# Dotted quads without leading zeros are already in canonical form and skip the slower ipaddress parsing.
+IPV4_ADDRESS_PATTERN = re.compile(
+    r"(?:(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\.){3}(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+)
+# Colon separated addresses, the usual form, only need lowercasing and skip the separator-agnostic pattern.
+COLON_MAC_ADDRESS_PATTERN = re.compile(r"(?:[0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}")
+MAC_ADDRESS_PATTERN = re.compile(
+    r"[0-9A-Fa-f]{2}([:-]?)(?:[0-9A-Fa-f]{2}\1){4}[0-9A-Fa-f]{2}|[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}"
+)
+MAC_ADDRESS_SEPARATORS = str.maketrans("", "", ":-.")
+
+
+def normalize_ip_address(value) -> str:
+    """Canonical text form of an IPv4 or IPv6 address, the same form Postgres uses for ``inet``."""
+    if isinstance(value, str) and IPV4_ADDRESS_PATTERN.fullmatch(value):
+        return value
+    try:
+        return str(ipaddress.ip_address(str(value)))
+    except ValueError:
+        raise ValueError("Invalid ip address format") from None
+
+
+def normalize_mac_address(value) -> str:
+    """Lowercase, colon separated form that Postgres uses for ``macaddr``, whatever separators were sent."""
+    if isinstance(value, str) and COLON_MAC_ADDRESS_PATTERN.fullmatch(value):
+        return value.lower()
+    if not isinstance(value, str) or not MAC_ADDRESS_PATTERN.fullmatch(value):
+        raise ValueError("Invalid MAC address format")
+    if len(value) == 17:
+        return value.replace("-", ":").lower()
+    digits = value.translate(MAC_ADDRESS_SEPARATORS).lower()
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+IpAddress = Annotated[str, BeforeValidator(normalize_ip_address)]
+MacAddress = Annotated[str, BeforeValidator(normalize_mac_address)]
 
 
 class DeviceCreateSchema(BaseModel):
-    ip_address: str
+    ip_address: IpAddress
     description: Optional[str] = None
 
-    @field_validator('ip_address')
-    def check_mac_address(cls, v):
-        mac_regex = r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$"
-        if not re.match(mac_regex, v):
-            raise ValueError('Invalid ip address format')
-        return v
-
 
 class DeviceInfoSchema(DeviceCreateSchema):
     id: UUID
@@ -26,19 +59,23 @@ class DeviceInfoSchema(DeviceCreateSchema):
 
 class TerminalCreateSchema(BaseModel):
     device_id: UUID
-    mac_address: str
+    mac_address: MacAddress
     model: str
 
-    @field_validator('mac_address')
-    def check_mac_address(cls, v):
-        mac_regex = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
-        if not re.match(mac_regex, v):
-            raise ValueError('Invalid MAC address format')
-        return v
-
 
 class TerminalInfoSchema(TerminalCreateSchema):
     id: UUID
 
     class Config:
         from_attributes = True
+
+
+class ImportErrorSchema(BaseModel):
+    line: int
+    error: str
+
+
+class TerminalImportSchema(BaseModel):
+    inserted: int
+    rejected: int
+    errors: list[ImportErrorSchema]
@@ -1,9 +1,20 @@
+import datetime
+import uuid
+from typing import AsyncIterator, Awaitable, Callable
 from uuid import UUID
 
 from fastapi import Depends
+from pydantic import ValidationError
 
+from app.cache import SingleFlightCache, Version
+from app.devices.cache import device_list_cache, terminal_list_cache
 from app.devices.models import Terminal, Device
+from app.config import settings
+from app.devices.exceptions import IpAddressTakenException, MacAddressTakenException
 from app.devices.repositories import DeviceRepository, get_device_repository
+from app.devices.schemas import TerminalCreateSchema
+from app.devices.utils import chunked
+from app.pagination import encode_page, paginate
 
 
 class DeviceService:
@@ -11,21 +22,116 @@ class DeviceService:
     def __init__(self, device_db: DeviceRepository):
         self.device_db = device_db
 
-    async def get_devices(self) -> list[Device]:
-        return await self.device_db.get_devices()
+    async def get_devices(self, limit: int, after: UUID | None = None, version: Version | None = None) -> bytes:
+        async def load() -> bytes:
+            return encode_page(paginate(await self.device_db.get_devices(limit + 1, after), limit))
 
-    async def get_terminals(self) -> list[Terminal]:
-        return await self.device_db.get_terminals()
+        return await self._cached_page(device_list_cache, version, limit, after, load)
+
+    async def get_terminals(self, limit: int, after: UUID | None = None, version: Version | None = None) -> bytes:
+        async def load() -> bytes:
+            return encode_page(paginate(await self.device_db.get_terminals(limit + 1, after), limit))
+
+        return await self._cached_page(terminal_list_cache, version, limit, after, load)
+
+    async def get_device_terminals(self, device_id: UUID, limit: int, after: UUID | None = None) -> dict | None:
+        """A page of the device's terminals, or None when the device does not exist."""
+        terminals = await self.device_db.get_device_terminals(device_id, limit + 1, after)
+        # Only an empty first page needs the extra lookup to tell a device without terminals from a missing one.
+        if not terminals and not after and not await self.device_db.get_device_by_id(device_id):
+            return None
+        return paginate(terminals, limit)
 
     async def create_device(self, device_data: dict) -> Device:
-        return await self.device_db.create_device(device_data)
+        device = await self.device_db.create_device(device_data)
+        if device is None:
+            raise IpAddressTakenException
+        return device
+
+    async def create_devices(self, devices_data: list[dict], skip_duplicates: bool = False) -> list[Device]:
+        devices = await self.device_db.create_devices(devices_data)
+        if not skip_duplicates and len(devices) < len(devices_data):
+            raise IpAddressTakenException
+        await self.device_db.save()
+        return devices
+
+    async def get_device_by_ip_address(self, ip_address: str) -> Device | None:
+        return await self.device_db.get_device_by_ip_address(ip_address)
 
-    async def create_terminal(self, terminal_data: dict) -> Device:
-        return await self.device_db.create_terminal(terminal_data)
+    async def get_terminal_by_mac_address(self, mac_address: str) -> Terminal | None:
+        return await self.device_db.get_terminal_by_mac_address(mac_address)
+
+    async def create_terminal(self, terminal_data: dict) -> Terminal:
+        terminal = await self.device_db.create_terminal(terminal_data)
+        if terminal is None:
+            raise MacAddressTakenException
+        return terminal
 
     async def delete_terminal(self, terminal_id: UUID) -> None:
         return await self.device_db.delete_terminal(terminal_id)
 
+    async def import_terminals(self, rows: AsyncIterator[tuple[int, dict | None]]) -> dict:
+        report = {"inserted": 0, "rejected": 0, "errors": []}
+        imported_mac_addresses = set()
+        async for chunk in chunked(rows, settings.TERMINAL_IMPORT_CHUNK_SIZE):
+            terminals = []
+            for line_number, row in chunk:
+                if row is None:
+                    self._reject(report, line_number, "Malformed row")
+                    continue
+                try:
+                    terminals.append((line_number, TerminalCreateSchema.model_validate(row)))
+                except ValidationError as exc:
+                    self._reject(report, line_number, "; ".join(
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+                    ))
+            if not terminals:
+                continue
+            device_ids = await self.device_db.get_existing_device_ids({terminal.device_id for _, terminal in terminals})
+            existing_mac_addresses = await self.device_db.get_existing_mac_addresses(
+                {terminal.mac_address for _, terminal in terminals}
+            )
+            date_created = datetime.datetime.now()
+            records = []
+            for line_number, terminal in terminals:
+                if terminal.device_id not in device_ids:
+                    self._reject(report, line_number, "device_id: No such device")
+                    continue
+                if terminal.mac_address in existing_mac_addresses:
+                    self._reject(report, line_number, "mac_address: Terminal with this MAC address exists")
+                    continue
+                if terminal.mac_address in imported_mac_addresses:
+                    self._reject(report, line_number, "mac_address: Duplicate MAC address in import")
+                    continue
+                imported_mac_addresses.add(terminal.mac_address)
+                records.append((uuid.uuid4(), terminal.device_id, terminal.mac_address, terminal.model, date_created))
+            if records:
+                report["inserted"] += await self.device_db.copy_terminals(records)
+        await self.device_db.save()
+        return report
+
+    @staticmethod
+    async def _cached_page(
+            cache: SingleFlightCache,
+            version: Version | None,
+            limit: int,
+            after: UUID | None,
+            load: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        """The encoded page from the list cache, or from ``load`` when the collection version is unknown.
+
+        Without a version a cached page could be stale, and Redis is most likely down anyway.
+        """
+        if version is None:
+            return await load()
+        return await cache.get_or_load(f"{version.number}:{limit}:{after or ''}", load)
+
+    @staticmethod
+    def _reject(report: dict, line_number: int, error: str) -> None:
+        report["rejected"] += 1
+        if len(report["errors"]) < settings.TERMINAL_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_number, "error": error})
+
 
 async def get_device_service(device_db: DeviceRepository = Depends(get_device_repository)):
     yield DeviceService(device_db)
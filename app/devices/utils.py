@@ -0,0 +1,76 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator
+
+from app.devices.exceptions import InvalidImportEncodingException, UnsupportedImportFormatException
+
+CSV_CONTENT_TYPES = ("text/csv",)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    try:
+        async for chunk in stream:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise InvalidImportEncodingException
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_import_rows(stream: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[int, dict | None]]:
+    """Yield ``(line_number, row)`` pairs; ``row`` is None when the line cannot be parsed at all."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        rows = _iter_csv_rows(iter_lines(stream))
+    elif media_type in NDJSON_CONTENT_TYPES:
+        rows = _iter_ndjson_rows(iter_lines(stream))
+    else:
+        raise UnsupportedImportFormatException
+    async for row in rows:
+        yield row
+
+
+async def chunked(rows: AsyncIterator[Any], size: int) -> AsyncIterator[list[Any]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None]]:
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield line_number, dict(zip(header, values)) if len(values) == len(header) else None
+
+
+async def _iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
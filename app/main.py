@@ -1,16 +1,57 @@
+import asyncio
+import logging
 import os
 import sys
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
 from fastapi import FastAPI
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from app.admission import admission_middleware, global_gate
+from app.auth.cache import user_cache
+from app.auth.outbox import run_email_outbox_relay
 from app.auth.routes import router as auth_router
+from app.devices.cache import device_list_cache, terminal_list_cache
+from app.devices.heartbeats import flush_heartbeats, heartbeat_stats, run_heartbeat_flusher
 from app.devices.routes import router as device_router
+from app.metrics import metrics, metrics_middleware, register_stats
+from app.query_stats import query_stats_middleware
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    heartbeat_stop = asyncio.Event()
+    heartbeat_flusher = asyncio.create_task(run_heartbeat_flusher(heartbeat_stop))
+    email_outbox_relay = asyncio.create_task(run_email_outbox_relay())
+    yield
+    email_outbox_relay.cancel()
+    with suppress(asyncio.CancelledError):
+        await email_outbox_relay
+    # Let a running flush finish instead of cancelling it halfway through a batch.
+    heartbeat_stop.set()
+    await heartbeat_flusher
+    try:
+        await flush_heartbeats()
+    except Exception:
+        logger.exception("Final terminal heartbeat flush failed")
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(auth_router)
 app.include_router(device_router)
+app.middleware("http")(query_stats_middleware)
+app.middleware("http")(admission_middleware)
+app.middleware("http")(metrics_middleware)
+app.add_route("/metrics", metrics, include_in_schema=False)
+
+register_stats("user_cache", user_cache.stats, counters={"local_hits", "redis_hits", "misses"})
+register_stats("device_list_cache", device_list_cache.stats, counters={"hits", "waits", "misses"})
+register_stats("terminal_list_cache", terminal_list_cache.stats, counters={"hits", "waits", "misses"})
+register_stats("admission", global_gate.stats)
+register_stats("terminal_heartbeat", heartbeat_stats.as_dict, counters={"flushes"})
 
 if __name__ == "__main__":
     uvicorn.run(
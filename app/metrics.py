@@ -0,0 +1,110 @@
+import time
+from typing import Callable, Iterable
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.routing import Match
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by route template.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled, by route template.",
+    ["method", "route"],
+)
+REQUESTS_SHED = Counter(
+    "http_requests_shed",
+    "Requests turned away with 503 by admission control, by route template and reason.",
+    ["method", "route", "reason"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool, including new connects.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state.",
+    ["engine", "state"],
+)
+TASK_ENQUEUE_LATENCY = Histogram(
+    "celery_task_enqueue_seconds",
+    "Time spent publishing a Celery task to the broker.",
+    ["task"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EMAIL_OUTBOX_DELAY = Histogram(
+    "email_outbox_delay_seconds",
+    "Time a verification email waited in the outbox before it was handed to Celery.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class StatsCollector(Collector):
+    """Exports a ``stats()`` dict of in-process counters without copying them into prometheus metrics."""
+
+    def __init__(self, prefix: str, stats: Callable[[], dict], counters: Iterable[str] = ()):
+        self.prefix = prefix
+        self.stats = stats
+        self.counters = set(counters)
+
+    def collect(self):
+        for name, value in self.stats().items():
+            metric_name = f"{self.prefix}_{name}"
+            if name in self.counters:
+                yield CounterMetricFamily(metric_name, f"{self.prefix} {name}", value=value)
+            else:
+                yield GaugeMetricFamily(metric_name, f"{self.prefix} {name}", value=value)
+
+
+_stats_collectors: dict[str, StatsCollector] = {}
+
+
+def register_stats(prefix: str, stats: Callable[[], dict], counters: Iterable[str] = ()) -> None:
+    """Export ``stats()`` under ``prefix``, replacing an earlier registration of the same prefix.
+
+    ``python app/main.py`` runs the module as ``__mp_main__`` and then imports ``app.main`` again under the
+    reloader, so module-level registration happens twice in one process.
+    """
+    if prefix in _stats_collectors:
+        REGISTRY.unregister(_stats_collectors[prefix])
+    collector = StatsCollector(prefix, stats, counters)
+    REGISTRY.register(collector)
+    _stats_collectors[prefix] = collector
+
+
+def route_template(request: Request) -> str:
+    """Path template of the matching route, so ids in the URL do not become separate label values."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+async def metrics_middleware(request: Request, call_next):
+    method = request.method
+    route = route_template(request)
+    in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+    in_flight.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_flight.dec()
+        REQUEST_LATENCY.labels(method, route, str(status)).observe(time.perf_counter() - started)
+
+
+async def metrics(request: Request) -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -3,7 +3,7 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
-from app.auth.models import RefreshToken, User, VerifyCode
+from app.auth.models import EmailOutbox, RefreshToken, User, VerifyCode
 from app.devices.models import Device, Terminal
 from app.config import settings
 from app.database import Base
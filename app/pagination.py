@@ -0,0 +1,74 @@
+import base64
+import binascii
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+from uuid import UUID
+
+import orjson
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from app.auth.exceptions import DetailedHTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+T = TypeVar("T")
+
+
+class InvalidCursorException(DetailedHTTPException):
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+    DETAIL = "Invalid pagination cursor"
+
+
+class PageSchema(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(key: UUID) -> str:
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str | None) -> UUID | None:
+    if not cursor:
+        return None
+    try:
+        return UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidCursorException
+
+
+def paginate(rows: Sequence[Any], limit: int, key: Callable[[Any], UUID] = lambda row: row.id) -> dict:
+    """Build a page from rows fetched with ``limit + 1``; the extra row only signals a next page."""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def encode_page(page: dict) -> bytes:
+    """JSON of a page of plain ``Row`` objects, encoded straight with orjson.
+
+    The rows must already have the schema's columns in its field order; values orjson does not
+    know natively, such as ``inet`` addresses, are encoded with ``str``.
+    """
+    return orjson.dumps(
+        {"items": [row._asdict() for row in page["items"]], "next_cursor": page["next_cursor"]},
+        default=str,
+    )
+
+
+class PageResponse(Response):
+    """A page from ``paginate`` over plain rows, or its ``encode_page`` bytes, e.g. from a cache.
+
+    Listing routes return it instead of ORM objects so that FastAPI skips validating every row against the
+    response model, which stays declared for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: dict | bytes) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return encode_page(content)
@@ -0,0 +1,88 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import Request
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_START_KEY = "query_start"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    budget: int | None = None
+
+
+_request_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    duration = time.perf_counter() - conn.info[QUERY_START_KEY].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+    if duration >= settings.DB_SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            "Slow query took %.1f ms: %s; parameters: %s",
+            duration * 1000, " ".join(statement.split()), parameter_shape(parameters),
+        )
+
+
+def parameter_shape(parameters) -> str:
+    """Types and sizes of bound parameters, without their values."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {_value_shape(value)}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    return "(" + ", ".join(_value_shape(value) for value in parameters or ()) + ")"
+
+
+def _value_shape(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many SQL statements the endpoint may run per request."""
+
+    async def declare_query_budget() -> None:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+
+    return declare_query_budget
+
+
+async def query_stats_middleware(request: Request, call_next):
+    stats = QueryStats()
+    _request_stats.set(stats)
+    response = await call_next(request)
+    logger.debug(
+        "%s %s ran %s queries in %.1f ms", request.method, request.url.path, stats.count, stats.duration * 1000,
+        extra={"db_queries": stats.count, "db_time": stats.duration},
+    )
+    if settings.DB_QUERY_STATS_HEADERS:
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["Server-Timing"] = f"db;dur={stats.duration * 1000:.1f}"
+    if stats.budget is not None and stats.count > stats.budget:
+        message = f"{request.method} {request.url.path} ran {stats.count} queries, budget is {stats.budget}"
+        if settings.DB_QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
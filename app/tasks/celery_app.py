@@ -9,3 +9,9 @@ celery = Celery(
 )
 
 celery.conf.broker_connection_retry_on_startup = True
+celery.conf.beat_schedule = {
+    "purge-expired-auth-rows": {
+        "task": "app.tasks.tasks.purge_expired_auth_rows",
+        "schedule": settings.PURGE_EXPIRED_INTERVAL,
+    },
+}
@@ -0,0 +1,105 @@
+import logging
+import queue
+import smtplib
+import time
+from email.message import EmailMessage
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """Logged-in SMTP sessions reused across tasks of one worker process.
+
+    Connections idle for longer than ``health_check_after`` seconds are probed with NOOP before reuse, and a
+    batch that hits a dropped connection is resumed once on a fresh one. A message the server rejects, e.g. for
+    a refused recipient, is reported and skipped without giving up the connection or the rest of the batch.
+    """
+
+    def __init__(self, size: int, health_check_after: float):
+        self.size = size
+        self.health_check_after = health_check_after
+        self._idle: queue.LifoQueue[tuple[smtplib.SMTP, float]] = queue.LifoQueue()
+
+    def send_messages(self, messages: list[EmailMessage]) -> list[tuple[EmailMessage, Exception]]:
+        """Send ``messages`` in order and return the ones that failed, with their errors."""
+        pending = list(messages)
+        failed = []
+        for attempt in range(2):
+            server = self._acquire()
+            try:
+                while pending:
+                    try:
+                        server.send_message(pending[0])
+                    except CONNECTION_ERRORS:
+                        raise
+                    except Exception as exc:
+                        logger.warning("Could not send e-mail to %s: %r", pending[0]["To"], exc)
+                        failed.append((pending[0], exc))
+                    pending.pop(0)
+            except CONNECTION_ERRORS:
+                self._discard(server)
+                if attempt:
+                    raise
+                logger.warning("SMTP connection dropped, resending %s messages on a new one", len(pending))
+            else:
+                self._release(server)
+                return failed
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - released_at < self.health_check_after or self._is_alive(server):
+                return server
+            self._discard(server)
+
+    def _release(self, server: smtplib.SMTP) -> None:
+        if self._idle.qsize() >= self.size:
+            self._discard(server)
+            return
+        self._idle.put((server, time.monotonic()))
+
+    @staticmethod
+    def _connect() -> smtplib.SMTP:
+        """A logged-in session; without SMTP_SSL it upgrades with STARTTLS first, never logging in over plain text."""
+        smtp_class = smtplib.SMTP_SSL if settings.SMTP_SSL else smtplib.SMTP
+        server = smtp_class(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        try:
+            if not settings.SMTP_SSL:
+                server.starttls()
+            server.login(settings.SMTP_USER, settings.SMTP_PASS)
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+smtp_pool = SMTPConnectionPool(settings.SMTP_POOL_SIZE, settings.SMTP_HEALTH_CHECK_AFTER)
@@ -1,8 +1,18 @@
-import smtplib
+import asyncio
+import datetime
+import logging
 
+from celery.signals import worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.auth.repositories import AuthRepository
 from app.config import settings
 from app.tasks.celery_app import celery
 from app.tasks.email_templates import create_email_verification_template
+from app.tasks.smtp import smtp_pool
+
+logger = logging.getLogger(__name__)
 
 
 @celery.task
@@ -11,10 +21,52 @@ def sent_verification_email(
         code: str,
         action: str
 ):
-    email_to = email_to
     msg_content = create_email_verification_template(email_to, code, action)
-
-    with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-        server.login(settings.SMTP_USER, settings.SMTP_PASS)
-        server.send_message(msg_content)
+    for _, exc in smtp_pool.send_messages([msg_content]):
+        raise exc
     return f'Code {code} has been sent successfully on {email_to}'
+
+
+@celery.task
+def sent_verification_emails(emails: list[dict]):
+    """Send a batch of ``{"email_to", "code", "action"}`` messages over one pooled SMTP session."""
+    messages = [create_email_verification_template(**email) for email in emails]
+    failed = smtp_pool.send_messages(messages)
+    return f'{len(messages) - len(failed)} codes have been sent successfully, {len(failed)} failed'
+
+
+@worker_process_shutdown.connect
+def close_smtp_connections(**kwargs):
+    smtp_pool.close()
+
+
+@celery.task
+def purge_expired_auth_rows() -> dict:
+    purged = asyncio.run(_purge_expired_auth_rows())
+    logger.info("Purged expired auth rows: %s", purged)
+    return purged
+
+
+async def _purge_expired_auth_rows() -> dict:
+    """Delete expired rows in PURGE_EXPIRED_BATCH_SIZE chunks, one short transaction per chunk."""
+    # Every task run has its own event loop, so pooled asyncpg connections cannot be reused between runs.
+    engine = create_async_engine(settings.DB_URL, poolclass=NullPool)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    expired_before = datetime.datetime.now()
+    purged = {"refresh_token": 0, "verify_code": 0}
+    try:
+        async with session_maker() as session:
+            auth_db = AuthRepository(session)
+            for table, delete_expired in (
+                    ("refresh_token", auth_db.delete_expired_refresh_tokens),
+                    ("verify_code", auth_db.delete_expired_verify_codes),
+            ):
+                for _ in range(settings.PURGE_EXPIRED_MAX_BATCHES):
+                    deleted = await delete_expired(expired_before, settings.PURGE_EXPIRED_BATCH_SIZE)
+                    await session.commit()
+                    purged[table] += deleted
+                    if deleted < settings.PURGE_EXPIRED_BATCH_SIZE:
+                        break
+    finally:
+        await engine.dispose()
+    return purged
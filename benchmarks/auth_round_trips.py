@@ -0,0 +1,88 @@
+"""Database round trips and latency per auth endpoint, per-call commits vs unit-of-work.
+
+Drives register -> verify_register -> login -> verify_login -> refresh -> me
+in process through the ASGI app against the configured Postgres and Redis.
+Verification codes are pinned so the flow can complete; e-mails are still
+written to the outbox as usual (no relay runs here, so they stay queued).
+
+Run from the project root: python -m benchmarks.auth_round_trips [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from app.auth.services import AuthService
+from app.config import settings
+from app.database import engine
+from app.main import app
+
+CODE = "BENCHX"
+ENDPOINTS = ("register", "verify_register", "login", "verify_login", "refresh", "me")
+
+
+class RoundTripCounter:
+    def __init__(self):
+        self.count = 0
+        for name in ("before_cursor_execute", "begin", "commit", "rollback"):
+            event.listen(engine.sync_engine, name, self._increment)
+
+    def _increment(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def timed(counter: RoundTripCounter, results: dict, endpoint: str, request) -> dict:
+    counter.count = 0
+    started = time.perf_counter()
+    response = await request
+    results[endpoint]["latency"].append(time.perf_counter() - started)
+    results[endpoint]["round_trips"].append(counter.count)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_flow(client: AsyncClient, counter: RoundTripCounter, results: dict) -> None:
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    user_data = {"email": email, "first_name": "Bench", "last_name": "Bench", "middle_name": "Bench"}
+    code_data = {"email": email, "code": CODE}
+    await timed(counter, results, "register", client.post("/auth/register", json=user_data))
+    await timed(counter, results, "verify_register", client.post("/auth/verify_register", json=code_data))
+    await timed(counter, results, "login", client.post("/auth/login", json={"email": email}))
+    tokens = await timed(counter, results, "verify_login", client.post("/auth/verify_login", json=code_data))
+    refresh_data = {"token": tokens["refresh_token"]}
+    tokens = await timed(counter, results, "refresh", client.post("/auth/refresh", json=refresh_data))
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    await timed(counter, results, "me", client.get("/auth/me", headers=headers))
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def main(iterations: int) -> None:
+    AuthService._generate_unique_code = staticmethod(lambda: CODE)
+    counter = RoundTripCounter()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for unit_of_work in (False, True):
+            settings.DB_UNIT_OF_WORK = unit_of_work
+            results = defaultdict(lambda: {"latency": [], "round_trips": []})
+            for _ in range(iterations):
+                await run_flow(client, counter, results)
+            print(f"DB_UNIT_OF_WORK={unit_of_work}")
+            print(f"  {'endpoint':<16}{'round trips':>12}{'p50 ms':>10}{'p99 ms':>10}")
+            for endpoint in ENDPOINTS:
+                latency = results[endpoint]["latency"]
+                print(
+                    f"  {endpoint:<16}{statistics.mean(results[endpoint]['round_trips']):>12.1f}"
+                    f"{percentile(latency, 50) * 1000:>10.2f}{percentile(latency, 99) * 1000:>10.2f}"
+                )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,57 @@
+"""EXPLAIN ANALYZE of the login email lookup with and without the lower(email) index.
+
+Seeds auth_user inside a transaction, prints the plan of the repository query
+against the current schema and against the pre-migration plain ``email``
+index, then rolls everything back. The index swap holds an exclusive lock on
+auth_user until the rollback, so only point it at a development database.
+
+Run from the project root: python -m benchmarks.explain_email_lookup [rows]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.auth.models import User
+from app.database import engine
+
+SEED_USERS = text(
+    "INSERT INTO auth_user (id, first_name, middle_name, last_name, email, is_active, is_superuser) "
+    "SELECT gen_random_uuid(), 'Bench', 'Bench', 'Bench', 'Bench' || g || '@Example.com', true, false "
+    "FROM generate_series(1, :rows) AS g"
+)
+
+
+def explain_statement(email: str) -> str:
+    statement = select(User).where(func.lower(User.email) == email.lower())
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    return f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"
+
+
+async def print_plan(connection, title: str, email: str) -> None:
+    result = await connection.execute(text(explain_statement(email)))
+    print(f"--- {title}")
+    for (line,) in result:
+        print(line)
+
+
+async def main(rows: int) -> None:
+    email = f"bench{rows // 2}@example.com"
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await connection.execute(SEED_USERS, {"rows": rows})
+            await connection.execute(text("ANALYZE auth_user"))
+            await print_plan(connection, "after: unique index on lower(email)", email)
+            await connection.execute(text("DROP INDEX ix_auth_user_email_lower"))
+            await connection.execute(text("CREATE UNIQUE INDEX ix_auth_user_email ON auth_user (email)"))
+            await connection.execute(text("ANALYZE auth_user"))
+            await print_plan(connection, "before: unique index on email", email)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
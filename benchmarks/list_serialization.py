@@ -0,0 +1,131 @@
+"""Latency and memory of a terminal listing page, ORM + response model vs plain rows + orjson.
+
+Seeds one device with terminals inside a transaction and builds pages of each size from
+them both ways, then rolls everything back:
+- orm: ``select(Terminal)`` hydrated into ORM objects, validated against
+  PageSchema[TerminalInfoSchema] and dumped with json, as FastAPI does for a response model;
+- rows: the repository's column-only select encoded by PageResponse.
+Both paths query the session directly, below DeviceService's list cache, and the seeded
+rows are never committed, so neither ETags nor cached pages are involved.
+Each size is timed over several repeats (fetch and encode separately, best of the repeats)
+and measured once more under tracemalloc for peak Python memory. Page sizes here go past
+MAX_PAGE_SIZE on purpose, to show how the two paths scale.
+
+Run from the project root: python -m benchmarks.list_serialization [--sizes 10000,100000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+import uuid
+
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.devices.models import Terminal
+from app.devices.repositories import DeviceRepository
+from app.devices.schemas import TerminalInfoSchema
+from app.pagination import PageResponse, PageSchema, paginate
+
+SEED_TERMINALS = text(
+    "INSERT INTO terminal (id, device_id, mac_address, model, date_created) "
+    "SELECT gen_random_uuid(), :device_id, ('02ff' || lpad(to_hex(g), 8, '0'))::macaddr, 'Bench', now() "
+    "FROM generate_series(1, :rows) AS g"
+)
+page_adapter = TypeAdapter(PageSchema[TerminalInfoSchema])
+
+
+async def fetch_orm(session: AsyncSession, device_id: uuid.UUID, size: int) -> dict:
+    statement = select(Terminal).where(Terminal.device_id == device_id).order_by(Terminal.id).limit(size + 1)
+    result = await session.execute(statement)
+    return paginate(list(result.scalars()), size)
+
+
+def encode_orm(page: dict) -> bytes:
+    content = page_adapter.dump_python(page_adapter.validate_python(page, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def fetch_rows(session: AsyncSession, device_id: uuid.UUID, size: int) -> dict:
+    return paginate(await DeviceRepository(session).get_device_terminals(device_id, size + 1), size)
+
+
+def encode_rows(page: dict) -> bytes:
+    return PageResponse(page).body
+
+
+PATHS = {"orm": (fetch_orm, encode_orm), "rows": (fetch_rows, encode_rows)}
+
+
+async def measure(session: AsyncSession, device_id: uuid.UUID, size: int, path: str, repeat: int) -> dict:
+    fetch, encode = PATHS[path]
+    fetch_ms = encode_ms = float("inf")
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        page = await fetch(session, device_id, size)
+        fetched = time.perf_counter()
+        body = encode(page)
+        fetch_ms = min(fetch_ms, (fetched - started) * 1000)
+        encode_ms = min(encode_ms, (time.perf_counter() - fetched) * 1000)
+        del page
+    session.expunge_all()
+    tracemalloc.start()
+    page = await fetch(session, device_id, size)
+    encode(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.expunge_all()
+    return {
+        "fetch_ms": round(fetch_ms, 1),
+        "encode_ms": round(encode_ms, 1),
+        "total_ms": round(fetch_ms + encode_ms, 1),
+        "peak_mib": round(peak / 2 ** 20, 1),
+        "body_bytes": len(body),
+    }
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    # Every large page is a "slow query"; the warnings would only interleave with the table.
+    logging.getLogger("app.query_stats").setLevel(logging.ERROR)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            device_id = uuid.uuid4()
+            await connection.execute(
+                text("INSERT INTO device (id, ip_address, description) VALUES (:id, '100.127.255.254', 'Bench')"),
+                {"id": device_id},
+            )
+            await connection.execute(SEED_TERMINALS, {"device_id": device_id, "rows": max(sizes)})
+            await connection.execute(text("ANALYZE terminal"))
+            session = AsyncSession(bind=connection)
+            print(
+                f"{'rows':>8}{'path':>6}{'fetch ms':>10}{'encode ms':>11}{'total ms':>10}{'peak MiB':>10}{'bytes':>11}"
+            )
+            for size in sizes:
+                results = {path: await measure(session, device_id, size, path, repeat) for path in PATHS}
+                for path, result in results.items():
+                    print(
+                        f"{size:>8}{path:>6}{result['fetch_ms']:>10.1f}{result['encode_ms']:>11.1f}"
+                        f"{result['total_ms']:>10.1f}{result['peak_mib']:>10.1f}{result['body_bytes']:>11}"
+                    )
+                speedup = results["orm"]["total_ms"] / results["rows"]["total_ms"]
+                memory = results["orm"]["peak_mib"] / results["rows"]["peak_mib"]
+                print(f"{'':>8}{'':>6}  rows path {speedup:.1f}x faster, {memory:.1f}x less peak memory")
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
@@ -0,0 +1,359 @@
+"""End-to-end load test of the HTTP API with throughput and p50/p95/p99 latency as JSON.
+
+Starts the app under uvicorn, a Celery worker and an aiosmtpd stand-in for the SMTP
+provider, all against the configured Postgres and Redis. Verification codes are read
+from the e-mails the stand-in receives, so the auth flow takes the same path a user's
+does: request -> outbox -> Celery -> SMTP.
+
+Scenarios:
+- auth_flow: virtual users run register -> verify_register -> login -> verify_login
+  -> refresh, then call /auth/me a few times. The wait for each e-mail is reported as
+  the email_delivery "endpoint".
+- listing_<size>: device and terminal tables are seeded up to each size with COPY, then
+  GET /devices/ and GET /devices/terminals are called for the first page and for pages
+  at random keyset cursors.
+
+Seeded rows are tagged "loadtest" and removed with --cleanup. Devices get addresses
+from 100.64.0.0/10 (at most ~4M); use a database without real devices in that range.
+
+Run from the project root:
+    python -m benchmarks.load_test --sizes 1000,100000,1000000 --output load_test.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from functools import partial
+
+import asyncpg
+import httpx
+from aiosmtpd.smtp import SMTP, AuthResult
+
+from app.config import settings
+from app.database import set_type_codecs
+from app.devices.cache import device_version, terminal_version
+from app.pagination import encode_cursor
+
+TAG = "loadtest"
+CODE_PATTERN = re.compile(r"<h1>(\w+)</h1>")
+
+
+class CodeInbox:
+    """aiosmtpd handler resolving one future per (recipient, action) with the code from the e-mail."""
+
+    def __init__(self):
+        self.waiting: dict[tuple[str, str], asyncio.Future] = {}
+
+    def expect(self, email: str, action: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[(email, action)] = future
+        return future
+
+    async def handle_DATA(self, server, session, envelope):
+        body = envelope.content.decode(errors="replace")
+        action = "register" if "Code for register" in body else "login"
+        code = CODE_PATTERN.search(body)
+        for email in envelope.rcpt_tos:
+            future = self.waiting.pop((email, action), None)
+            if future and not future.done() and code:
+                future.set_result(code.group(1))
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def call(self, endpoint: str, request) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if response.is_error:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+    def results(self, scenario: str, elapsed: float) -> list[dict]:
+        return [
+            {
+                "scenario": scenario,
+                "endpoint": endpoint,
+                "requests": len(latencies),
+                "errors": self.errors[endpoint],
+                "throughput": round(len(latencies) / elapsed, 1),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+            }
+            for endpoint, latencies in self.latencies.items()
+        ]
+
+
+def percentile(values: list[float], q: int) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return round(values[0] * 1000, 2)
+    return round(statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000, 2)
+
+
+async def run_auth_flow(
+        client: httpx.AsyncClient, inbox: CodeInbox, recorder: Recorder, me_calls: int, timeout: float
+) -> dict | None:
+    """One virtual user; returns its tokens, or None if a step failed."""
+    email = f"{TAG}-{uuid.uuid4().hex}@example.com"
+    user_data = {"email": email, "first_name": "Load", "last_name": "Test", "middle_name": "Load"}
+
+    async def receive_code(action: str, request, endpoint: str) -> str | None:
+        code = inbox.expect(email, action)
+        if not await recorder.call(endpoint, request):
+            return None
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(code, timeout)
+        except asyncio.TimeoutError:
+            recorder.errors["email_delivery"] += 1
+            return None
+        recorder.latencies["email_delivery"].append(time.perf_counter() - started)
+        return value
+
+    code = await receive_code("register", client.post("/auth/register", json=user_data), "register")
+    if not code or not await recorder.call(
+            "verify_register", client.post("/auth/verify_register", json={"email": email, "code": code})
+    ):
+        return None
+    code = await receive_code("login", client.post("/auth/login", json={"email": email}), "login")
+    if not code:
+        return None
+    response = await recorder.call(
+        "verify_login", client.post("/auth/verify_login", json={"email": email, "code": code})
+    )
+    if not response:
+        return None
+    response = await recorder.call(
+        "refresh", client.post("/auth/refresh", json={"token": response.json()["refresh_token"]})
+    )
+    if not response:
+        return None
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    for _ in range(me_calls):
+        await recorder.call("me", client.get("/auth/me", headers=headers))
+    return tokens
+
+
+async def run_concurrently(jobs: int, concurrency: int, job) -> float:
+    """Run ``job()`` ``jobs`` times with at most ``concurrency`` in flight; returns the wall time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await job()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(jobs)))
+    return time.perf_counter() - started
+
+
+async def seed(connection: asyncpg.Connection, size: int) -> None:
+    """Top the tagged devices and terminals up to ``size`` rows each."""
+    devices = await connection.fetchval("SELECT count(*) FROM device WHERE description = $1", TAG)
+    if devices < size:
+        await connection.copy_records_to_table(
+            "device",
+            columns=["id", "ip_address", "description"],
+            records=(
+                (uuid.uuid4(), f"100.{64 + (i >> 16 & 63)}.{i >> 8 & 255}.{i & 255}", TAG)
+                for i in range(devices, size)
+            ),
+        )
+    device_ids = [
+        row["id"] for row in await connection.fetch("SELECT id FROM device WHERE description = $1", TAG)
+    ]
+    terminals = await connection.fetchval("SELECT count(*) FROM terminal WHERE model = $1", TAG)
+    if terminals < size:
+        now = datetime.datetime.now()
+        await connection.copy_records_to_table(
+            "terminal",
+            columns=["id", "device_id", "mac_address", "model", "date_created"],
+            records=(
+                (uuid.uuid4(), device_ids[i % len(device_ids)], "02:00:" + ":".join(
+                    f"{i >> shift & 255:02x}" for shift in (24, 16, 8, 0)
+                ), TAG, now)
+                for i in range(terminals, size)
+            ),
+        )
+    await connection.execute("ANALYZE device; ANALYZE terminal")
+    await bump_collection_versions()
+
+
+async def bump_collection_versions() -> None:
+    """COPY bypasses DeviceRepository, so retire cached listing pages and ETags of the previous size by hand."""
+    await device_version.bump()
+    await terminal_version.bump()
+
+
+async def sample_cursors(connection: asyncpg.Connection, table: str, count: int) -> list[str | None]:
+    """First page plus keyset cursors at random depths."""
+    rows = await connection.fetch(f"SELECT id FROM {table} ORDER BY random() LIMIT $1", count)
+    return [None] + [encode_cursor(row["id"]) for row in rows]
+
+
+async def run_listings(
+        client: httpx.AsyncClient, connection: asyncpg.Connection, headers: dict, args
+) -> list[dict]:
+    results = []
+    for size in args.sizes:
+        started = time.perf_counter()
+        await seed(connection, size)
+        logging.info("Seeded %s devices and terminals in %.1fs", size, time.perf_counter() - started)
+        for endpoint, path, table in (
+                ("devices", "/devices/", "device"),
+                ("terminals", "/devices/terminals", "terminal"),
+        ):
+            recorder = Recorder()
+            cursors = await sample_cursors(connection, table, args.listing_requests)
+
+            async def list_page(endpoint=endpoint, path=path, cursors=cursors, recorder=recorder):
+                params = {"limit": args.page_size}
+                after = random.choice(cursors)
+                if after:
+                    params["after"] = after
+                await recorder.call(endpoint, client.get(path, params=params, headers=headers))
+
+            elapsed = await run_concurrently(args.listing_requests, args.concurrency, list_page)
+            results += recorder.results(f"listing_{size}", elapsed)
+    return results
+
+
+async def cleanup(connection: asyncpg.Connection) -> None:
+    await connection.execute("DELETE FROM device WHERE description = $1", TAG)
+    await connection.execute("DELETE FROM auth_user WHERE email LIKE $1", f"{TAG}-%@example.com")
+    await bump_collection_versions()
+
+
+def start_process(command: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        command, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/metrics")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def main(args) -> dict:
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    inbox = CodeInbox()
+    smtp_server = await asyncio.get_running_loop().create_server(
+        partial(SMTP, inbox, authenticator=accept_any_login, auth_require_tls=False), "127.0.0.1", args.smtp_port
+    )
+    smtp_env = {"SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(args.smtp_port), "SMTP_SSL": "false"}
+    processes = [
+        start_process(
+            [sys.executable, "-m", "celery", "-A", "app.tasks.celery_app:celery", "worker",
+             "--pool", "threads", "--concurrency", str(args.celery_concurrency)],
+            smtp_env,
+        ),
+    ]
+    base_url = args.url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        processes.append(start_process(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--workers", str(args.workers), "--no-access-log"],
+            smtp_env,
+        ))
+    connection = await asyncpg.connect(
+        host=settings.DB_HOST, port=settings.DB_PORT, user=settings.DB_USER,
+        password=settings.DB_PASS, database=settings.DB_NAME,
+    )
+    await set_type_codecs(connection)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await wait_until_ready(client)
+            recorder = Recorder()
+            flow = partial(run_auth_flow, client, inbox, recorder, args.me_calls, args.timeout)
+            elapsed = await run_concurrently(args.users, args.concurrency, flow)
+            results += recorder.results("auth_flow", elapsed)
+
+            tokens = await run_auth_flow(client, inbox, Recorder(), 0, args.timeout)
+            if not tokens:
+                raise RuntimeError("Could not log in for the listing scenarios")
+            headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+            results += await run_listings(client, connection, headers, args)
+    finally:
+        if args.cleanup:
+            await cleanup(connection)
+        await connection.close()
+        for process in processes:
+            process.terminate()
+            process.wait()
+        smtp_server.close()
+    return {
+        "started_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+
+
+def parse_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Target a running server instead of starting uvicorn")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--celery-concurrency", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200, help="Virtual users running the auth flow")
+    parser.add_argument("--me-calls", type=int, default=10, help="/auth/me calls per virtual user")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests or flows in flight")
+    parser.add_argument(
+        "--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[1000, 100000, 1000000]
+    )
+    parser.add_argument("--listing-requests", type=int, default=1000, help="Requests per listing endpoint and size")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--cleanup", action="store_true", help="Delete seeded rows and load-test users afterwards")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    arguments = parse_args()
+    report = json.dumps(asyncio.run(main(arguments)), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(report)
+    else:
+        print(report)
@@ -0,0 +1,136 @@
+"""Micro-benchmarks for the pure-Python code that runs on every request, checked against stored baselines.
+
+Each case is timed with timeit in microseconds per call. Every repeat times the case and
+then a fixed reference workload, and the case is judged by the median over the repeats
+of its time relative to that reference, so a baseline recorded on one machine stays
+usable on a somewhat faster or slower one, and a noisy neighbour or a single unlucky
+repeat does not decide the result. A case fails when its median ratio is higher than
+the baseline's by more than --threshold.
+
+Run from the project root:
+    python -m benchmarks.micro                   # compare with micro_baseline.json, exit 1 on regressions
+    python -m benchmarks.micro --update          # record new baselines
+    python -m benchmarks.micro --threshold 0.1 parse_token_cached create_access_token
+"""
+import argparse
+import json
+import statistics
+import sys
+import timeit
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from app.auth.schemas import UserCreateSchema, VerifyCodeSchema
+from app.auth.services import AuthService
+from app.auth.utils import parse_token, token_cache
+from app.devices.schemas import DeviceCreateSchema, TerminalCreateSchema
+
+BASELINE_PATH = Path(__file__).with_name("micro_baseline.json")
+
+
+class _User:
+    id = uuid.uuid4()
+
+
+def reference_workload() -> None:
+    sorted(str(i) for i in range(200))
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    token = AuthService._create_access_token(_User())
+    user_data = {"email": "user@example.com", "first_name": "Ivan", "last_name": "Ivanov", "middle_name": "Ivanovich"}
+    code_data = {"email": "user@example.com", "code": "ABCDEF"}
+    device_data = {"ip_address": "192.168.0.1", "description": "Gate"}
+    terminal_data = {"device_id": str(_User.id), "mac_address": "00:1A:2B:3C:4D:5E", "model": "T-1000"}
+
+    def parse_token_uncached():
+        token_cache.clear()
+        parse_token(token)
+
+    return {
+        "parse_token_cached": lambda: parse_token(token),
+        "parse_token_uncached": parse_token_uncached,
+        "create_access_token": lambda: AuthService._create_access_token(_User),
+        "generate_unique_string": AuthService._generate_unique_string,
+        "hash_token": lambda: AuthService._hash_token(token),
+        "user_create_schema": lambda: UserCreateSchema.model_validate(user_data),
+        "verify_code_schema": lambda: VerifyCodeSchema.model_validate(code_data),
+        "device_create_schema": lambda: DeviceCreateSchema.model_validate(device_data),
+        "terminal_create_schema": lambda: TerminalCreateSchema.model_validate(terminal_data),
+    }
+
+
+def measure(case: Callable[[], object], repeat: int, min_time: float) -> dict[str, float]:
+    """Median time per call in microseconds of the case and of the reference run alongside it, and their ratio."""
+    timers = {"us": timeit.Timer(case), "reference_us": timeit.Timer(reference_workload)}
+    numbers = {key: max(int(timer.autorange()[0] * min_time / 0.2), 1) for key, timer in timers.items()}
+    samples = {key: [] for key in timers}
+    ratios = []
+    for _ in range(repeat):
+        for key, timer in timers.items():
+            samples[key].append(timer.timeit(numbers[key]) / numbers[key] * 1e6)
+        ratios.append(samples["us"][-1] / samples["reference_us"][-1])
+    result = {key: round(statistics.median(values), 3) for key, values in samples.items()}
+    result["ratio"] = round(statistics.median(ratios), 5)
+    return result
+
+
+def run(names: list[str], repeat: int, min_time: float) -> dict[str, dict[str, float]]:
+    cases = build_cases()
+    unknown = set(names) - set(cases)
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(sorted(unknown))}")
+    return {name: measure(cases[name], repeat, min_time) for name in names or cases}
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Print a table and return the names of cases slower than allowed."""
+    print(f"{'case':<26}{'us/call':>10}{'expected':>10}{'change':>9}")
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<26}{result['us']:>10.2f}{'-':>10}{'new':>9}")
+            continue
+        expected = baseline[name]["ratio"] * result["reference_us"]
+        change = result["ratio"] / baseline[name]["ratio"] - 1
+        failed = change > threshold
+        print(f"{name:<26}{result['us']:>10.2f}{expected:>10.2f}{change:>+9.0%}{'  REGRESSION' if failed else ''}")
+        if failed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="Cases to run, all by default")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per repeat")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.repeat, args.min_time)
+    if args.update:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        for name, result in results.items():
+            print(f"{name:<26}{result['us']:>10.2f} us")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        raise SystemExit(f"No baseline at {args.baseline}, run with --update first")
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+            f"{', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
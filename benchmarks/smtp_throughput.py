@@ -0,0 +1,122 @@
+"""Verification e-mail throughput against a local aiosmtpd stand-in server.
+
+Compares a new SMTP session per message (the previous task body), the pooled
+connection used by sent_verification_email, and batches sent with
+sent_verification_emails. Tasks are called in process, without a broker. The
+stand-in requires STARTTLS with a throwaway self-signed certificate, so every new
+session pays a TLS handshake as it would against a real provider.
+
+Run from the project root: python -m benchmarks.smtp_throughput [messages] [batch size]
+"""
+import datetime
+import ipaddress
+import logging
+import smtplib
+import ssl
+import sys
+import tempfile
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from app.config import settings
+from app.tasks.email_templates import create_email_verification_template
+from app.tasks.smtp import smtp_pool
+from app.tasks.tasks import sent_verification_email, sent_verification_emails
+
+HOST, PORT = "127.0.0.1", 8025
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def self_signed_tls_context() -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, HOST)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(HOST))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    with tempfile.NamedTemporaryFile() as pem:
+        pem.write(certificate.public_bytes(serialization.Encoding.PEM))
+        pem.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+        pem.flush()
+        context.load_cert_chain(pem.name)
+    return context
+
+
+def send_with_new_session(email_to: str, code: str, action: str) -> None:
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+        server.starttls()
+        server.login(settings.SMTP_USER, settings.SMTP_PASS)
+        server.send_message(create_email_verification_template(email_to, code, action))
+
+
+def measure(title: str, messages: int, send) -> None:
+    started = time.perf_counter()
+    send()
+    elapsed = time.perf_counter() - started
+    print(f"{title:<28}{messages / elapsed:>10.0f} msg/s")
+
+
+def main(messages: int, batch_size: int) -> None:
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_SSL = HOST, PORT, False
+    handler = CountingHandler()
+    controller = Controller(
+        handler,
+        hostname=HOST,
+        port=PORT,
+        authenticator=accept_any_login,
+        tls_context=self_signed_tls_context(),
+        require_starttls=True,
+    )
+    controller.start()
+    emails = [{"email_to": f"user{i}@example.com", "code": "ABCDEF", "action": "login"} for i in range(messages)]
+    try:
+        measure("new session per message", messages, lambda: [send_with_new_session(**email) for email in emails])
+        measure(
+            "pooled, one task per message", messages, lambda: [sent_verification_email(**email) for email in emails]
+        )
+        measure(
+            f"pooled, batches of {batch_size}",
+            messages,
+            lambda: [sent_verification_emails(emails[i:i + batch_size]) for i in range(0, messages, batch_size)],
+        )
+    finally:
+        smtp_pool.close()
+        controller.stop()
+    print(f"server received {handler.received} messages")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )